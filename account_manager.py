@@ -1,147 +1,661 @@
-import json
+import hashlib
+import logging
 import os
+import secrets
 import uuid
 import copy
+from bisect import bisect_left
+from collections.abc import Iterable, Mapping
+from contextlib import contextmanager
 from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Iterator, NamedTuple
 
+from account_record import AccountRecord
+from account_storage import (
+    DEFAULT_SNAPSHOT_FORMAT, SNAPSHOT_SUFFIXES, create_storage, read_json_snapshot,
+    write_json_snapshot,
+)
+from batch_parser import split_line
+from search_index import SearchIndex
+from sorted_index import OrderIndex
+
+logger = logging.getLogger(__name__)
 
 TAG_OPTIONS = ["家庭组", "成品号", "资格号"]
 
+# List orderings: import order, email A–Z, most recently updated first
+SORT_CREATED = "created"
+SORT_EMAIL = "email"
+SORT_UPDATED = "updated"
+SORT_OPTIONS = [SORT_CREATED, SORT_EMAIL, SORT_UPDATED]
+SORT_LABELS = {SORT_CREATED: "导入序", SORT_EMAIL: "A→Z", SORT_UPDATED: "更新序"}
+
+# Change kinds published to AccountManager subscribers
+CHANGE_ADDED = "added"
+CHANGE_UPDATED = "updated"
+CHANGE_TAGS = "tags_changed"
+CHANGE_DELETED = "deleted"
+CHANGE_RELOADED = "reloaded"  # whole store replaced (load/restore); ids is empty
+
+
+class AccountChange(NamedTuple):
+    kind: str
+    ids: frozenset[str]
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return MappingProxyType(value)
+    return value
+
+
+class AccountView(Mapping):
+    """Read-only, live view of a stored account.
+
+    Supports the usual dict reads (``acc["email"]``, ``acc.get("tags", [])``);
+    lists come back as tuples so nothing can be changed in place. Call
+    copy() for an editable dict.
+    """
+
+    __slots__ = ("_acc",)
+
+    def __init__(self, acc: AccountRecord):
+        self._acc = acc
+
+    def __getitem__(self, key):
+        return _freeze(self._acc[key])
+
+    def __iter__(self):
+        return iter(self._acc)
+
+    def __len__(self):
+        return len(self._acc)
+
+    def __repr__(self):
+        return f"AccountView({self._acc['email']!r})"
+
+    def copy(self) -> dict:
+        return self._acc.to_dict()
+
 
 class AccountManager:
-    def __init__(self, data_file: str = None):
+    def __init__(self, data_file: str = None, storage: str = "json",
+                 snapshot_format: str = DEFAULT_SNAPSHOT_FORMAT):
         if data_file is None:
             base_dir = os.path.dirname(os.path.abspath(__file__))
             data_file = os.path.join(base_dir, "accounts_data.json")
         self.data_file = data_file
-        self.accounts: list[dict] = []
+        # Format of full snapshots (data file, backups); any format loads
+        self.snapshot_format = snapshot_format
+        self._storage = create_storage(storage, data_file, snapshot_format)
+        # id -> account; dict keeps insertion (import) order
+        self._by_id: dict[str, AccountRecord] = {}
+        # lowercase email -> ids in import order (duplicates are allowed)
+        self._by_email: dict[str, list[str]] = {}
+        # tag -> ids carrying it
+        self._by_tag: dict[str, set[str]] = {}
+        self._search = SearchIndex()
+        # sort_by -> ids kept in that order; _seq numbers accounts in import
+        # order and breaks ties between equal emails / timestamps
+        self._orders = {sort_by: OrderIndex() for sort_by in SORT_OPTIONS}
+        self._seq: dict[str, int] = {}
+        self._next_seq = 0
+        # keyed password digest -> ids using that password. Only digests are
+        # kept, under a key that lives as long as this process.
+        self._password_key = secrets.token_bytes(32)
+        self._by_password: dict[bytes, set[str]] = {}
+        # Accounts with a non-empty totp_secret
+        self._totp_count = 0
+        # >0 while inside batch(); writes are deferred until the outermost exit
+        self._batch_depth = 0
+        # Inside batch(): id -> (record, seq) as it was before the batch, or
+        # None for accounts the batch added
+        self._undo: dict[str, tuple[AccountRecord, int] | None] | None = None
+        self._subscribers: list[Callable[[AccountChange], None]] = []
+        # kind -> ids changed since the last publish
+        self._changes: dict[str, set[str]] = {}
         self.load()
 
+    @property
+    def accounts(self) -> list[AccountRecord]:
+        return self._account_list()
+
+    def _account_list(self) -> list[AccountRecord]:
+        # Handed to the storage engine, which builds the list only if needed
+        return list(self._by_id.values())
+
     def load(self) -> None:
-        if os.path.exists(self.data_file):
+        self._rebuild_index(self._storage.load())
+        self._changes.clear()
+        self._publish([AccountChange(CHANGE_RELOADED, frozenset())])
+
+    def save(self) -> None:
+        """Write the full store, regardless of pending changes."""
+        self._storage.save_all(self.accounts)
+
+    def _commit(self) -> None:
+        """Persist pending changes now, or defer them when inside a batch."""
+        if not self._batch_depth:
+            self._storage.commit(self._account_list)
+            self._publish(self._take_changes())
+
+    # ── Change notifications ───────────────────────────────
+
+    def subscribe(self, callback: Callable[[AccountChange], None]) -> None:
+        """Call *callback* with an AccountChange after every committed change.
+
+        Changes made inside batch() are coalesced and delivered once the
+        batch commits; nothing is delivered for a rolled-back batch.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[AccountChange], None]) -> None:
+        try:
+            self._subscribers.remove(callback)
+        except ValueError:
+            pass
+
+    def _record_change(self, kind: str, account_id: str) -> None:
+        if kind == CHANGE_DELETED and account_id in self._changes.get(CHANGE_ADDED, ()):
+            # Added and removed before anyone saw it
+            for ids in self._changes.values():
+                ids.discard(account_id)
+            return
+        self._changes.setdefault(kind, set()).add(account_id)
+
+    def _take_changes(self) -> list[AccountChange]:
+        changes = [AccountChange(kind, frozenset(self._changes[kind]))
+                   for kind in (CHANGE_ADDED, CHANGE_UPDATED, CHANGE_TAGS, CHANGE_DELETED)
+                   if self._changes.get(kind)]
+        self._changes.clear()
+        return changes
+
+    def _publish(self, changes: list[AccountChange]) -> None:
+        # The changes are already saved; a failing subscriber must not look
+        # like a failed write to the caller
+        for change in changes:
+            for callback in list(self._subscribers):
+                try:
+                    callback(change)
+                except Exception:
+                    logger.exception("Account change subscriber failed")
+
+    @contextmanager
+    def batch(self):
+        """Apply many mutations in memory and write them out once.
+
+        If the block raises (or the final write fails) every change made
+        inside it is rolled back. Nested batches join the outermost one.
+        """
+        if self._batch_depth:
+            self._batch_depth += 1
             try:
-                with open(self.data_file, "r", encoding="utf-8") as f:
-                    self.accounts = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                self.accounts = []
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+
+        # Only the accounts the batch touches are copied (see _remember())
+        undo = self._undo = {}
+        next_seq = self._next_seq
+        self._batch_depth = 1
+        try:
+            yield self
+            self._batch_depth = 0
+            self._storage.commit(self._account_list)
+        except BaseException:
+            self._storage.rollback()
+            self._undo_batch(undo, next_seq)
+            self._changes.clear()
+            raise
+        finally:
+            self._batch_depth = 0
+            self._undo = None
+        self._publish(self._take_changes())
+
+    def _remember(self, account_id: str) -> None:
+        """Inside batch(), keep the pre-batch state of *account_id* for rollback."""
+        undo = self._undo
+        if undo is None or account_id in undo:
+            return
+        acc = self._by_id.get(account_id)
+        # Records share their immutable values, so a shallow copy restores one
+        undo[account_id] = None if acc is None else (acc.copy(), self._seq[account_id])
+
+    def _undo_batch(self, undo: dict, next_seq: int) -> None:
+        for acc_id, before in undo.items():
+            if acc_id in self._by_id:
+                self._index_remove(acc_id)
+            if before is not None:
+                self._index_add(*before)
+        self._next_seq = next_seq
+        if any(before is not None for before in undo.values()):
+            # Re-added accounts went to the end; put them back in import order
+            seq = self._seq
+            self._by_id = dict(sorted(self._by_id.items(), key=lambda item: seq[item[0]]))
+
+    # ── Backup / restore ───────────────────────────────────
+
+    def snapshot(self) -> list[dict]:
+        """Point-in-time copy of every account that another thread may read.
+
+        Copies are shallow: nested values (tags, cookies) are always
+        replaced, never mutated in place, so sharing them is safe.
+        """
+        return [acc.to_dict(deep=False) for acc in self._by_id.values()]
+
+    def backup_to(self, path: str, accounts: list[dict] | None = None) -> None:
+        """Write the store to *path* as a standalone file in snapshot_format.
+
+        Pass a snapshot() taken earlier to run the write on another thread.
+        """
+        write_json_snapshot(path, self.accounts if accounts is None else accounts,
+                            self.snapshot_format)
+
+    @property
+    def backup_suffix(self) -> str:
+        """File name suffix matching snapshot_format, e.g. ".json.gz"."""
+        return SNAPSHOT_SUFFIXES.get(self.snapshot_format, ".json")
+
+    @staticmethod
+    def read_backup(path: str) -> list[dict]:
+        """Parse a backup file in any format without touching the store (thread-safe)."""
+        return read_json_snapshot(path)
+
+    def restore_from(self, path: str) -> None:
+        """Replace the whole store with the contents of a backup file."""
+        self.restore_accounts(self.read_backup(path))
+
+    def restore_accounts(self, accounts: list[dict]) -> None:
+        """Replace the whole store with *accounts* (as read by read_backup())."""
+        self._storage.save_all(accounts)
+        self._rebuild_index(accounts)
+        self._changes.clear()
+        self._publish([AccountChange(CHANGE_RELOADED, frozenset())])
+
+    # ── Index maintenance ──────────────────────────────────
+
+    def _rebuild_index(self, accounts: list[Mapping]) -> None:
+        accounts = [AccountRecord.from_mapping(acc) for acc in accounts]
+        self._by_id = {}
+        self._by_email = {}
+        self._by_tag = {}
+        self._by_password = {}
+        self._totp_count = 0
+        self._seq = {}
+        keys = {sort_by: {} for sort_by in SORT_OPTIONS}
+        for seq, acc in enumerate(accounts):
+            acc_id = acc["id"]
+            email_key = acc["email"].lower()
+            self._by_id[acc_id] = acc
+            self._by_email.setdefault(email_key, []).append(acc_id)
+            self._index_tags(acc_id, acc.get("tags", []))
+            self._index_password(acc_id, acc.get("password", ""))
+            if acc.get("totp_secret"):
+                self._totp_count += 1
+            self._seq[acc_id] = seq
+            # Same keys as _index_order()
+            keys[SORT_CREATED][acc_id] = (seq,)
+            keys[SORT_EMAIL][acc_id] = (email_key, seq)
+            keys[SORT_UPDATED][acc_id] = (acc.get("updated_at", ""), seq)
+        self._next_seq = len(accounts)
+        self._search.rebuild(accounts)
+        for sort_by, order in self._orders.items():
+            order.rebuild(keys[sort_by])
+
+    def _index_add(self, acc: AccountRecord, seq: int | None = None) -> None:
+        """Index *acc*; *seq* is given when an account is put back by a rollback."""
+        acc_id = acc["id"]
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        self._seq[acc_id] = seq
+        self._by_id[acc_id] = acc
+        self._index_email(acc["email"], acc_id)
+        self._index_tags(acc_id, acc.get("tags", []))
+        self._index_password(acc_id, acc.get("password", ""))
+        if acc.get("totp_secret"):
+            self._totp_count += 1
+        self._search.add(acc)
+        self._index_order(acc)
+
+    def _index_remove(self, account_id: str) -> AccountRecord:
+        acc = self._by_id.pop(account_id)
+        self._index_remove_email(acc["email"], account_id)
+        self._unindex_tags(account_id, acc.get("tags", []))
+        self._unindex_password(account_id, acc.get("password", ""))
+        if acc.get("totp_secret"):
+            self._totp_count -= 1
+        self._search.remove(account_id)
+        for order in self._orders.values():
+            order.remove(account_id)
+        del self._seq[account_id]
+        return acc
+
+    def _index_email(self, email: str, account_id: str) -> None:
+        """Add *account_id* to its email bucket, kept in import (seq) order."""
+        ids = self._by_email.setdefault(email.lower(), [])
+        seq = self._seq[account_id]
+        if ids and self._seq[ids[-1]] > seq:
+            ids.insert(bisect_left(ids, seq, key=self._seq.__getitem__), account_id)
         else:
-            self.accounts = []
+            ids.append(account_id)
 
-    def save(self) -> None:
-        tmp_file = self.data_file + ".tmp"
-        with open(tmp_file, "w", encoding="utf-8") as f:
-            json.dump(self.accounts, f, ensure_ascii=False, indent=2)
-        os.replace(tmp_file, self.data_file)
+    def _index_remove_email(self, email: str, account_id: str) -> None:
+        key = email.lower()
+        ids = self._by_email.get(key)
+        if not ids:
+            return
+        try:
+            ids.remove(account_id)
+        except ValueError:
+            pass
+        if not ids:
+            del self._by_email[key]
 
-    def add_account(self, email: str, password: str,
-                    recovery_email: str = "", totp_secret: str = "",
-                    notes: str = "", tags: list[str] | None = None) -> dict:
-        now = datetime.now().isoformat(timespec="seconds")
-        account = {
+    def _index_tags(self, account_id: str, tags) -> None:
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(account_id)
+
+    def _unindex_tags(self, account_id: str, tags) -> None:
+        for tag in tags:
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.discard(account_id)
+                if not ids:
+                    del self._by_tag[tag]
+
+    def _index_order(self, acc: AccountRecord) -> None:
+        acc_id = acc["id"]
+        seq = self._seq[acc_id]
+        orders = self._orders
+        orders[SORT_CREATED].set(acc_id, (seq,))
+        orders[SORT_EMAIL].set(acc_id, (acc["email"].lower(), seq))
+        orders[SORT_UPDATED].set(acc_id, (acc.get("updated_at", ""), seq))
+
+    def _password_digest(self, password: str) -> bytes:
+        return hashlib.blake2b(password.encode("utf-8"), key=self._password_key,
+                               digest_size=16).digest()
+
+    def _index_password(self, account_id: str, password: str) -> None:
+        if password:
+            self._by_password.setdefault(self._password_digest(password), set()).add(account_id)
+
+    def _unindex_password(self, account_id: str, password: str) -> None:
+        if not password:
+            return
+        digest = self._password_digest(password)
+        ids = self._by_password.get(digest)
+        if ids is not None:
+            ids.discard(account_id)
+            if not ids:
+                del self._by_password[digest]
+
+    def _find_by_email(self, email: str) -> dict | None:
+        ids = self._by_email.get(email.lower())
+        if not ids:
+            return None
+        return self._by_id[ids[0]]
+
+    # ── CRUD ───────────────────────────────────────────────
+
+    @staticmethod
+    def _new_account(email: str, password: str, recovery_email: str = "",
+                     totp_secret: str = "", notes: str = "",
+                     tags: list[str] | None = None, now: str = None) -> AccountRecord:
+        now = now or datetime.now().isoformat(timespec="seconds")
+        return AccountRecord({
             "id": uuid.uuid4().hex,
             "email": email,
             "password": password,
             "recovery_email": recovery_email,
             "totp_secret": totp_secret,
             "notes": notes,
-            "tags": tags or [],
+            "tags": list(tags or []),
             "created_at": now,
             "updated_at": now,
-        }
-        self.accounts.append(account)
-        self.save()
-        return copy.deepcopy(account)
+        })
+
+    def _insert(self, account: AccountRecord) -> None:
+        self._remember(account["id"])
+        self._index_add(account)
+        self._storage.upsert(account)
+        self._record_change(CHANGE_ADDED, account["id"])
+
+    def add_account(self, email: str, password: str,
+                    recovery_email: str = "", totp_secret: str = "",
+                    notes: str = "", tags: list[str] | None = None) -> dict:
+        account = self._new_account(email, password, recovery_email,
+                                    totp_secret, notes, tags)
+        self._insert(account)
+        self._commit()
+        return account.to_dict()
+
+    def add_accounts(self, records: Iterable[Mapping]) -> int:
+        """Add many accounts in one commit and return how many were added.
+
+        Each record may carry email, password, recovery_email, totp_secret,
+        notes and tags; missing fields default to empty. Unlike
+        add_account() no copies are returned, which keeps large imports
+        cheap.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        count = 0
+        with self.batch():
+            for rec in records:
+                self._insert(self._new_account(
+                    rec.get("email", ""), rec.get("password", ""),
+                    rec.get("recovery_email", ""), rec.get("totp_secret", ""),
+                    rec.get("notes", ""), rec.get("tags"), now=now))
+                count += 1
+        return count
 
     def update_account(self, account_id: str, **fields) -> dict | None:
-        for acc in self.accounts:
-            if acc["id"] == account_id:
-                for key, value in fields.items():
-                    if key == "tags":
-                        acc["tags"] = value
-                    elif key in ("cookies", "cookie_updated_at"):
-                        acc[key] = value
-                    elif key in acc and key not in ("id", "created_at"):
-                        acc[key] = value
-                acc["updated_at"] = datetime.now().isoformat(timespec="seconds")
-                self.save()
-                return copy.deepcopy(acc)
-        return None
+        acc = self._by_id.get(account_id)
+        if acc is None:
+            return None
+        self._remember(account_id)
+        old_email = acc["email"]
+        old_password = acc.get("password", "")
+        had_totp = bool(acc.get("totp_secret"))
+        for key, value in fields.items():
+            if key == "tags":
+                if list(value) != acc.get("tags", []):
+                    self._unindex_tags(account_id, acc.get("tags", []))
+                    self._index_tags(account_id, value)
+                    self._record_change(CHANGE_TAGS, account_id)
+                acc["tags"] = value
+            elif key in ("cookies", "cookie_updated_at"):
+                acc[key] = value
+            elif key in acc and key not in ("id", "created_at"):
+                acc[key] = value
+        if acc["email"].lower() != old_email.lower():
+            self._index_remove_email(old_email, account_id)
+            self._index_email(acc["email"], account_id)
+        if acc.get("password", "") != old_password:
+            self._unindex_password(account_id, old_password)
+            self._index_password(account_id, acc.get("password", ""))
+        self._totp_count += bool(acc.get("totp_secret")) - had_totp
+        acc["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        self._search.update(acc)
+        self._index_order(acc)
+        self._storage.upsert(acc)
+        if fields.keys() - {"tags"}:
+            self._record_change(CHANGE_UPDATED, account_id)
+        self._commit()
+        return acc.to_dict()
 
     def save_cookies(self, email: str, cookies: list[dict]) -> bool:
         """Save cookies for an account identified by email."""
-        for acc in self.accounts:
-            if acc["email"] == email:
-                acc["cookies"] = cookies
-                acc["cookie_updated_at"] = datetime.now().isoformat(timespec="seconds")
-                self.save()
-                return True
-        return False
+        acc = self._find_by_email(email)
+        if acc is None:
+            return False
+        self._remember(acc["id"])
+        acc["cookies"] = cookies
+        acc["cookie_updated_at"] = datetime.now().isoformat(timespec="seconds")
+        self._storage.upsert(acc)
+        self._record_change(CHANGE_UPDATED, acc["id"])
+        self._commit()
+        return True
 
     def get_cookies(self, email: str) -> list[dict] | None:
         """Get saved cookies for an account. Returns None if no cookies."""
-        for acc in self.accounts:
-            if acc["email"] == email:
-                cookies = acc.get("cookies")
-                if cookies:
-                    return copy.deepcopy(cookies)
-                return None
+        acc = self._find_by_email(email)
+        if acc is None:
+            return None
+        cookies = acc.get("cookies")
+        if cookies:
+            return copy.deepcopy(cookies)
         return None
 
     def clear_cookies(self, email: str) -> bool:
         """Clear saved cookies for an account."""
-        for acc in self.accounts:
-            if acc["email"] == email:
-                acc.pop("cookies", None)
-                acc.pop("cookie_updated_at", None)
-                self.save()
-                return True
-        return False
+        acc = self._find_by_email(email)
+        if acc is None:
+            return False
+        self._remember(acc["id"])
+        acc.pop("cookies", None)
+        acc.pop("cookie_updated_at", None)
+        self._storage.upsert(acc)
+        self._record_change(CHANGE_UPDATED, acc["id"])
+        self._commit()
+        return True
 
     def delete_account(self, account_id: str) -> bool:
-        for i, acc in enumerate(self.accounts):
-            if acc["id"] == account_id:
-                self.accounts.pop(i)
-                self.save()
-                return True
-        return False
+        if account_id not in self._by_id:
+            return False
+        self._remember(account_id)
+        self._index_remove(account_id)
+        self._storage.delete(account_id)
+        self._record_change(CHANGE_DELETED, account_id)
+        self._commit()
+        return True
 
     def get_account(self, account_id: str) -> dict | None:
-        for acc in self.accounts:
-            if acc["id"] == account_id:
-                return copy.deepcopy(acc)
-        return None
+        """Return an editable copy of one account."""
+        acc = self._by_id.get(account_id)
+        if acc is None:
+            return None
+        return acc.to_dict()
+
+    def get_account_view(self, account_id: str) -> AccountView | None:
+        acc = self._by_id.get(account_id)
+        return AccountView(acc) if acc is not None else None
+
+    def get_account_by_email(self, email: str) -> dict | None:
+        """Case-insensitive lookup; returns the earliest imported match."""
+        acc = self._find_by_email(email)
+        if acc is None:
+            return None
+        return acc.to_dict()
+
+    def get_account_id(self, email: str) -> str | None:
+        """Return the id of the account with this email (case-insensitive)."""
+        ids = self._by_email.get(email.lower())
+        return ids[0] if ids else None
+
+    def has_email(self, email: str) -> bool:
+        return email.lower() in self._by_email
+
+    def get_all_accounts(self, sort_by: str = SORT_CREATED) -> list[AccountView]:
+        """Return read-only views; use get_account() or view.copy() to edit."""
+        by_id = self._by_id
+        return [AccountView(by_id[acc_id]) for acc_id in self.account_ids(sort_by)]
+
+    def account_count(self) -> int:
+        return len(self._by_id)
+
+    def totp_count(self) -> int:
+        """Number of accounts with a 2FA secret."""
+        return self._totp_count
+
+    def account_ids(self, sort_by: str = SORT_CREATED, start: int = 0,
+                    stop: int | None = None) -> list[str]:
+        """Ids at positions [start, stop) of the *sort_by* ordering.
+
+        Reads come straight from the maintained ordering, so a page costs
+        about the same no matter how many accounts there are.
+        """
+        return self._orders[sort_by].range(start, stop, reverse=sort_by == SORT_UPDATED)
+
+    def query_tags(self, all_of=(), any_of=(), none_of=()) -> set[str]:
+        """Ids of accounts matching a tag expression.
 
-    def get_all_accounts(self, sort_by: str = "created") -> list[dict]:
-        if sort_by == "created":
-            # Import order: keep original list order
-            return copy.deepcopy(self.accounts)
-        sorted_accounts = sorted(self.accounts, key=lambda a: a["email"].lower())
-        return copy.deepcopy(sorted_accounts)
-
-    def search_accounts(self, query: str, sort_by: str = "created") -> list[dict]:
-        q = query.lower()
-        results = [
-            acc for acc in self.accounts
-            if q in acc["email"].lower() or q in acc.get("recovery_email", "").lower()
-        ]
-        if sort_by == "email":
-            results.sort(key=lambda a: a["email"].lower())
-        return copy.deepcopy(results)
+        An account matches when it has every tag in *all_of*, at least one
+        tag in *any_of* (if given) and no tag in *none_of*. With no
+        arguments every account matches.
+        """
+        empty = frozenset()
+        if all_of:
+            # Start from the rarest tag so the intersection stays small
+            sets = sorted((self._by_tag.get(tag, empty) for tag in all_of), key=len)
+            result = set(sets[0]).intersection(*sets[1:])
+        elif not any_of:
+            result = set(self._by_id)
+        if any_of:
+            union = set().union(*(self._by_tag.get(tag, empty) for tag in any_of))
+            result = result & union if all_of else union
+        for tag in none_of:
+            result -= self._by_tag.get(tag, empty)
+        return result
+
+    def tag_counts(self) -> dict[str, int]:
+        """Number of accounts carrying each tag in use."""
+        return {tag: len(ids) for tag, ids in self._by_tag.items()}
+
+    def password_users(self, password: str, exclude_id: str | None = None) -> set[str]:
+        """Ids of accounts whose password is *password* (empty never matches)."""
+        if not password:
+            return set()
+        ids = set(self._by_password.get(self._password_digest(password), ()))
+        ids.discard(exclude_id)
+        return ids
+
+    def reused_password_groups(self) -> list[list[str]]:
+        """Groups of account ids sharing a password, each in import order."""
+        order = {acc_id: i for i, acc_id in enumerate(self._by_id)}
+        return [sorted(ids, key=order.__getitem__)
+                for ids in self._by_password.values() if len(ids) > 1]
+
+    def iter_accounts(self, sort_by: str = SORT_CREATED) -> Iterator[AccountView]:
+        """Yield read-only views one at a time, e.g. to stream an export."""
+        for acc_id in self.account_ids(sort_by):
+            acc = self._by_id.get(acc_id)
+            if acc is not None:
+                yield AccountView(acc)
+
+    def search_account_ids(self, query: str, sort_by: str = SORT_CREATED) -> list[str]:
+        """Ids of accounts matching *query*; every account when it is empty.
+
+        Case-insensitive substring match on email, recovery email, notes
+        and tags. Cheaper than search_accounts() when only ids are needed.
+        """
+        if not query:
+            return self.account_ids(sort_by)
+        ids = self._search.search(query)
+        if sort_by != SORT_CREATED:
+            ids = self._orders[sort_by].sort_ids(ids, reverse=sort_by == SORT_UPDATED)
+        return ids
+
+    def search_accounts(self, query: str, sort_by: str = SORT_CREATED) -> list[AccountView]:
+        return [AccountView(self._by_id[acc_id])
+                for acc_id in self.search_account_ids(query, sort_by)]
 
     @staticmethod
     def parse_batch_line(line: str) -> dict | None:
         """Parse 'email----password----recovery_email----totp_secret' format."""
-        line = line.strip()
-        if not line:
-            return None
-        parts = line.split("----")
-        if not parts[0]:
+        fields = split_line(line)
+        if fields is None:
             return None
+        email, password, recovery_email, totp_secret = fields
         return {
-            "email": parts[0].strip(),
-            "password": parts[1].strip() if len(parts) > 1 else "",
-            "recovery_email": parts[2].strip() if len(parts) > 2 else "",
-            "totp_secret": parts[3].strip() if len(parts) > 3 else "",
+            "email": email,
+            "password": password,
+            "recovery_email": recovery_email,
+            "totp_secret": totp_secret,
         }
 
     @staticmethod
@@ -0,0 +1,200 @@
+"""
+Compact in-memory account record.
+
+AccountManager used to keep every account as a plain dict. AccountRecord
+stores the known fields in __slots__ instead, which drops the per-account
+hash table:
+
+- tags are kept as a tuple of interned strings, and equal tag tuples are
+  shared, so the handful of TAG_OPTIONS combinations exist once;
+- timestamps stay the ISO text they were loaded from (interned, since bulk
+  imports share them) and are only parsed into datetimes on request;
+- unknown keys go to a small overflow dict, so nothing is lost.
+
+Records read like dicts (``acc["email"]``, ``acc.get("tags", [])``, ``in``,
+iteration, ``acc[key] = value``, ``pop``); a field that was never set is
+absent, like a missing dict key. ``tags`` reads back as a new list.
+"""
+import copy
+import sys
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime
+from operator import attrgetter
+
+# Known fields in the order they are written out
+FIELDS = ("id", "email", "password", "recovery_email", "totp_secret", "notes",
+          "tags", "created_at", "updated_at", "cookies", "cookie_updated_at")
+_FIELD_SET = frozenset(FIELDS)
+_TIMESTAMP_FIELDS = frozenset(("created_at", "updated_at", "cookie_updated_at"))
+
+# Held by slots of absent fields. Every slot is always filled so that all
+# fields can be read with one attrgetter call.
+_MISSING = object()
+_get_fields = attrgetter(*FIELDS)
+
+# tag tuple -> the shared instance of it
+_tag_tuples: dict[tuple, tuple] = {}
+
+
+def _intern_tags(tags) -> tuple:
+    if not tags:
+        return ()
+    key = tuple(sys.intern(tag) if type(tag) is str else tag for tag in tags)
+    return _tag_tuples.setdefault(key, key)
+
+
+def _intern_value(key: str, value):
+    if key == "tags":
+        return _intern_tags(value)
+    if key in _TIMESTAMP_FIELDS and type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+class AccountRecord(MutableMapping):
+    __slots__ = FIELDS + ("_extra",)
+
+    def __init__(self, fields: Mapping):
+        get = fields.get
+        for key in FIELDS:
+            setattr(self, key, get(key, _MISSING))
+        # Only these fields are interned; see _intern_value()
+        if self.tags is not _MISSING:
+            self.tags = _intern_tags(self.tags)
+        for key in _TIMESTAMP_FIELDS:
+            value = getattr(self, key)
+            if type(value) is str:
+                setattr(self, key, sys.intern(value))
+        self._extra = None
+        if not _FIELD_SET.issuperset(fields):
+            self._extra = {key: value for key, value in fields.items()
+                           if key not in _FIELD_SET}
+
+    @classmethod
+    def from_mapping(cls, fields: Mapping) -> "AccountRecord":
+        """Wrap *fields*; an AccountRecord is copied."""
+        if isinstance(fields, cls):
+            return fields.copy()
+        return cls(fields)
+
+    # ── Dict-style access ──────────────────────────────────
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            return list(value) if key == "tags" else value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is _MISSING:
+                return default
+            return list(value) if key == "tags" else value
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, _intern_value(key, value))
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in _FIELD_SET:
+            setattr(self, key, _MISSING)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key) -> bool:
+        if key in _FIELD_SET:
+            return getattr(self, key) is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        return iter(self.to_dict(deep=False))
+
+    def __len__(self) -> int:
+        return len(self.to_dict(deep=False))
+
+    def __repr__(self):
+        return f"AccountRecord({self.to_dict(deep=False)!r})"
+
+    def keys(self):
+        return self.to_dict(deep=False).keys()
+
+    def items(self):
+        return self.to_dict(deep=False).items()
+
+    def values(self):
+        return self.to_dict(deep=False).values()
+
+    def pop(self, key, *default):
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    # ── Copies ─────────────────────────────────────────────
+
+    def copy(self) -> "AccountRecord":
+        """Shallow copy; tags and timestamps are immutable and shared."""
+        clone = AccountRecord.__new__(AccountRecord)
+        for key, value in zip(FIELDS, _get_fields(self)):
+            setattr(clone, key, value)
+        clone._extra = dict(self._extra) if self._extra else None
+        return clone
+
+    def to_dict(self, deep: bool = True) -> dict:
+        """Plain dict with the same keys and order as the stored JSON.
+
+        With *deep* nested values such as cookies are copied too, so the
+        result can be edited freely.
+        """
+        result = {key: value for key, value in zip(FIELDS, _get_fields(self))
+                  if value is not _MISSING}
+        if "tags" in result:
+            result["tags"] = list(result["tags"])
+        if self._extra:
+            result.update(self._extra)
+        if deep:
+            for key, value in result.items():
+                if isinstance(value, (list, dict)) and key != "tags":
+                    result[key] = copy.deepcopy(value)
+        return result
+
+    def __deepcopy__(self, memo) -> dict:
+        # Deep copies were always editable plain dicts; keep it that way
+        return self.to_dict()
+
+    # ── Timestamps ─────────────────────────────────────────
+
+    def _parse_time(self, key: str) -> datetime | None:
+        value = getattr(self, key)
+        if value is _MISSING or not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    @property
+    def created(self) -> datetime | None:
+        return self._parse_time("created_at")
+
+    @property
+    def updated(self) -> datetime | None:
+        return self._parse_time("updated_at")
@@ -0,0 +1,539 @@
+"""
+Persistence engines behind AccountManager.
+
+AccountManager keeps every account in memory and tells its storage engine
+which records changed (upsert/delete). commit() then makes the pending
+changes durable; how that happens is up to the engine:
+
+- JsonStorage rewrites accounts_data.json on every commit (original format).
+- JournalStorage appends the changes to accounts_data.json.journal and
+  periodically folds the journal back into accounts_data.json.
+- SqliteStorage keeps one row per account in accounts_data.db and only
+  touches the rows that changed.
+
+Full snapshots (the JSON data file and backups) can be written in several
+formats, see SNAPSHOT_FORMATS. Reading detects the format from the file's
+first bytes, so every format, including the original indented JSON, loads
+regardless of the configured one.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Mapping
+
+try:
+    import orjson  # optional: several times faster than the json module
+except ImportError:
+    orjson = None
+
+try:
+    from compression import zstd  # standard library from Python 3.14
+except ImportError:
+    zstd = None
+
+# Snapshot format names; "pretty" is the original indent=2 layout
+SNAPSHOT_FORMATS = ["compact", "pretty", "gzip"] + (["zstd"] if zstd else [])
+DEFAULT_SNAPSHOT_FORMAT = "compact"
+
+# File name suffix for backups written in each format
+SNAPSHOT_SUFFIXES = {"gzip": ".json.gz", "zstd": ".json.zst"}
+
+# Magic bytes of the compressed formats -> decompress function
+_DECOMPRESSORS = [(b"\x1f\x8b", gzip.decompress)]
+if zstd:
+    _DECOMPRESSORS.append((b"\x28\xb5\x2f\xfd", zstd.decompress))
+
+# What a damaged or unreadable snapshot can raise while being read
+SNAPSHOT_ERRORS = (ValueError, OSError, EOFError, zlib.error) + ((zstd.ZstdError,) if zstd else ())
+
+
+def _json_default(value):
+    # In-memory account records are Mappings, not dicts; to_dict() is
+    # their fast path
+    if hasattr(value, "to_dict"):
+        return value.to_dict(deep=False)
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(value, indent: bool = False) -> bytes:
+    """UTF-8 JSON for *value* (account records included), compact by default."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default,
+                            option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(value, ensure_ascii=False, indent=2,
+                          default=_json_default).encode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"),
+                      default=_json_default).encode("utf-8")
+
+
+def loads_json(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def encode_snapshot(accounts: list[dict], fmt: str = DEFAULT_SNAPSHOT_FORMAT,
+                    generation: int | None = None) -> bytes:
+    """Serialize an account list in one of SNAPSHOT_FORMATS.
+
+    With a *generation* the list is wrapped as {"generation": n,
+    "accounts": [...]} (see JournalStorage); otherwise it is a bare list.
+    """
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown snapshot format: {fmt}")
+    if generation is not None:
+        accounts = {"generation": generation, "accounts": accounts}
+    data = dumps_json(accounts, indent=fmt == "pretty")
+    if fmt == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if fmt == "zstd":
+        return zstd.compress(data)
+    return data
+
+
+def decode_snapshot(data: bytes) -> tuple[list[dict], int]:
+    """Parse any snapshot written by encode_snapshot() (or an older version).
+
+    Returns (accounts, generation); a bare list is generation 0.
+    """
+    for magic, decompress in _DECOMPRESSORS:
+        if data.startswith(magic):
+            data = decompress(data)
+            break
+    value = loads_json(data)
+    if isinstance(value, dict):
+        return value["accounts"], value["generation"]
+    return value, 0
+
+
+def read_json_snapshot(path: str) -> list[dict]:
+    """Read a full account list written by write_json_snapshot()."""
+    return read_json_snapshot_generation(path)[0]
+
+
+def read_json_snapshot_generation(path: str) -> tuple[list[dict], int]:
+    with open(path, "rb") as f:
+        return decode_snapshot(f.read())
+
+
+def write_json_snapshot(path: str, accounts: list[dict],
+                        fmt: str = DEFAULT_SNAPSHOT_FORMAT,
+                        generation: int | None = None) -> None:
+    """Atomically replace *path* with the given account list."""
+    write_file_atomic(path, encode_snapshot(accounts, fmt, generation))
+
+
+def write_file_atomic(path: str, data: bytes) -> None:
+    """Replace *path* with *data* so that readers see the old or new file, never a mix."""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+class StorageEngine(ABC):
+    """Base class: collects pending changes until commit()."""
+
+    def __init__(self, data_file: str, snapshot_format: str = DEFAULT_SNAPSHOT_FORMAT):
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        self.data_file = data_file
+        self.snapshot_format = snapshot_format
+        # account id -> record to write, or None for a delete; insertion
+        # order is preserved so new accounts are written in import order
+        self._pending: dict[str, dict | None] = {}
+
+    @abstractmethod
+    def load(self) -> list[dict]:
+        ...
+
+    def upsert(self, account: dict) -> None:
+        self._pending[account["id"]] = account
+
+    def delete(self, account_id: str) -> None:
+        self._pending[account_id] = None
+
+    def rollback(self) -> None:
+        self._pending.clear()
+
+    @abstractmethod
+    def commit(self, get_accounts: Callable[[], list[dict]]) -> None:
+        """Write the pending changes.
+
+        *get_accounts* returns every account. Building that list is O(n),
+        so engines only call it when they rewrite the whole store.
+        """
+
+    @abstractmethod
+    def save_all(self, accounts: list[dict]) -> None:
+        ...
+
+
+class JsonStorage(StorageEngine):
+    """Whole-file JSON storage: every commit rewrites the data file."""
+
+    def load(self) -> list[dict]:
+        self._pending.clear()
+        if not os.path.exists(self.data_file):
+            return []
+        try:
+            return read_json_snapshot(self.data_file)
+        except SNAPSHOT_ERRORS:
+            return []
+
+    def commit(self, get_accounts: Callable[[], list[dict]]) -> None:
+        if self._pending:
+            self.save_all(get_accounts())
+
+    def save_all(self, accounts: list[dict]) -> None:
+        write_json_snapshot(self.data_file, accounts, self.snapshot_format)
+        self._pending.clear()
+
+
+class JournalStorage(JsonStorage):
+    """Snapshot + append-only journal.
+
+    Each commit appends ONE line to the journal holding every change of
+    that commit, then fsyncs. A crash mid-append leaves a torn last line,
+    which fails to parse and is dropped (with everything after it) on the
+    next load, so a batch is either fully applied or not at all.
+
+    Once the journal exceeds ``compact_threshold`` bytes it is renamed to
+    ``.journal.old`` and a background thread writes a fresh snapshot, then
+    deletes the old journal. Until that finishes, load() replays
+    snapshot → .journal.old → .journal; replaying already-applied changes
+    is harmless because every entry carries the full record.
+
+    A failed append (e.g. disk full) is truncated away and its changes stay
+    pending for the next commit, so later lines never follow a torn one.
+    If even the truncate fails, commits rewrite the whole snapshot through
+    save_all() until one succeeds.
+
+    save_all() replaces the store outright, so journal entries from before
+    it must never be replayed over its snapshot. The snapshot and every
+    journal line carry a generation number that save_all() increments;
+    load() skips lines older than the snapshot, so a crash before the old
+    journals are deleted cannot bring back replaced records.
+    """
+
+    def __init__(self, data_file: str, snapshot_format: str = DEFAULT_SNAPSHOT_FORMAT,
+                 compact_threshold: int = 1024 * 1024):
+        super().__init__(data_file, snapshot_format)
+        self.journal_file = data_file + ".journal"
+        self.compact_threshold = compact_threshold
+        self._compactor: threading.Thread | None = None
+        self._generation = 0
+        # Set when a failed append could not be undone; see commit()
+        self._journal_broken = False
+
+    @property
+    def _old_journal_file(self) -> str:
+        return self.journal_file + ".old"
+
+    # ── Load / replay ──────────────────────────────────────
+
+    def load(self) -> list[dict]:
+        self.wait_for_compaction()
+        self._pending.clear()
+        accounts, self._generation = [], 0
+        if os.path.exists(self.data_file):
+            try:
+                accounts, self._generation = read_json_snapshot_generation(self.data_file)
+            except SNAPSHOT_ERRORS:
+                pass
+        by_id = {acc["id"]: acc for acc in accounts}
+        replayed = False
+        for path in (self._old_journal_file, self.journal_file):
+            replayed |= self._replay(path, by_id)
+        accounts = list(by_id.values())
+        if replayed:
+            # Fold what we just replayed into a clean snapshot right away
+            self.save_all(accounts)
+        return accounts
+
+    def _replay(self, path: str, by_id: dict[str, dict]) -> bool:
+        if not os.path.exists(path):
+            return False
+        good_size = 0
+        with open(path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # torn write at the tail
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    break
+                good_size += len(raw)
+                if entry.get("gen", 0) < self._generation:
+                    continue  # written before the snapshot replaced the store
+                for acc_id, acc in entry["ops"]:
+                    if acc is None:
+                        by_id.pop(acc_id, None)
+                    else:
+                        by_id[acc_id] = acc
+        if good_size != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_size)
+        return True
+
+    # ── Commit ─────────────────────────────────────────────
+
+    def commit(self, get_accounts: Callable[[], list[dict]]) -> None:
+        if not self._pending:
+            return
+        if self._journal_broken:
+            self.save_all(get_accounts())
+            return
+        ops = [[acc_id, acc] for acc_id, acc in self._pending.items()]
+        line = json.dumps({"gen": self._generation, "ops": ops},
+                          ensure_ascii=False, separators=(",", ":"),
+                          default=_json_default) + "\n"
+        size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        try:
+            with open(self.journal_file, "ab") as f:
+                f.write(line.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            # Drop the partial line; _pending still holds its changes
+            try:
+                os.truncate(self.journal_file, size)
+            except OSError:
+                self._journal_broken = True
+            raise
+        self._pending.clear()
+        if os.path.getsize(self.journal_file) >= self.compact_threshold:
+            self._start_compaction(get_accounts)
+
+    def save_all(self, accounts: list[dict]) -> None:
+        self.wait_for_compaction()
+        write_json_snapshot(self.data_file, accounts, self.snapshot_format,
+                            self._generation + 1)
+        self._generation += 1
+        self._pending.clear()
+        # Stale now (see the class docstring); removed to save space, and
+        # so nothing is ever appended after a torn line
+        for path in (self.journal_file, self._old_journal_file):
+            if os.path.exists(path):
+                os.remove(path)
+        self._journal_broken = False
+
+    # ── Compaction ─────────────────────────────────────────
+
+    def _start_compaction(self, get_accounts: Callable[[], list[dict]]) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return  # next commit over the threshold will try again
+        if os.path.exists(self._old_journal_file):
+            return
+        # The live records keep changing on the caller's thread; a shallow
+        # copy is enough because nested values are replaced, never mutated.
+        snapshot = [dict(acc) for acc in get_accounts()]
+        os.replace(self.journal_file, self._old_journal_file)
+        self._compactor = threading.Thread(
+            target=self._compact, args=(snapshot, self._generation), name="journal-compactor")
+        self._compactor.start()
+
+    def _compact(self, snapshot: list[dict], generation: int) -> None:
+        # Same generation: the journals stay valid on top of this snapshot
+        write_json_snapshot(self.data_file, snapshot, self.snapshot_format, generation)
+        os.remove(self._old_journal_file)
+
+    def wait_for_compaction(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+
+class SqliteStorage(StorageEngine):
+    """One row per account in a local SQLite file next to the JSON file.
+
+    The known fields get their own columns; anything else (cookies, ...)
+    goes into the ``extra`` JSON column. Tags are mirrored into an
+    ``account_tags`` table so they can be queried by index. ``seq`` keeps
+    the import order that the JSON list used to encode by position.
+
+    If accounts_data.json exists, its data is migrated in one transaction
+    on first load. The JSON file is left untouched as a fallback. Whether
+    the migration still has to run is kept in ``PRAGMA user_version`` (see
+    the MIGRATION_* values), which is only set to done in the migration's
+    own transaction, so a failed attempt is retried on the next load.
+    """
+
+    # PRAGMA user_version values. Databases made before the marker existed
+    # read as 0 and count as migrated once they hold any account.
+    MIGRATION_UNKNOWN = 0
+    MIGRATION_PENDING = 1
+    MIGRATION_DONE = 2
+
+    COLUMNS = ("id", "email", "password", "recovery_email", "totp_secret",
+               "notes", "tags", "created_at", "updated_at")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id             TEXT PRIMARY KEY,
+            seq            INTEGER NOT NULL,
+            email          TEXT NOT NULL,
+            email_lower    TEXT NOT NULL,
+            password       TEXT NOT NULL DEFAULT '',
+            recovery_email TEXT NOT NULL DEFAULT '',
+            totp_secret    TEXT NOT NULL DEFAULT '',
+            notes          TEXT NOT NULL DEFAULT '',
+            tags           TEXT NOT NULL DEFAULT '[]',
+            created_at     TEXT NOT NULL DEFAULT '',
+            updated_at     TEXT NOT NULL DEFAULT '',
+            extra          TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_accounts_seq ON accounts(seq);
+        CREATE INDEX IF NOT EXISTS idx_accounts_email ON accounts(email_lower);
+        CREATE INDEX IF NOT EXISTS idx_accounts_created ON accounts(created_at);
+        CREATE TABLE IF NOT EXISTS account_tags (
+            account_id TEXT NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+            tag        TEXT NOT NULL,
+            PRIMARY KEY (account_id, tag)
+        );
+        CREATE INDEX IF NOT EXISTS idx_account_tags_tag ON account_tags(tag);
+    """
+
+    def __init__(self, data_file: str, snapshot_format: str = DEFAULT_SNAPSHOT_FORMAT):
+        super().__init__(data_file, snapshot_format)
+        self.db_file = os.path.splitext(data_file)[0] + ".db"
+        self._conn: sqlite3.Connection | None = None
+        self._next_seq = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def load(self) -> list[dict]:
+        self._pending.clear()
+        is_new = not os.path.exists(self.db_file)
+        conn = self._connect()
+        state = conn.execute("PRAGMA user_version").fetchone()[0]
+        if state == self.MIGRATION_UNKNOWN:
+            has_rows = conn.execute("SELECT 1 FROM accounts LIMIT 1").fetchone() is not None
+            state = self.MIGRATION_DONE if has_rows and not is_new else self.MIGRATION_PENDING
+            self._set_migration_state(conn, state)
+        if state == self.MIGRATION_PENDING:
+            if os.path.exists(self.data_file):
+                self._migrate_from_json(conn)
+            else:
+                self._set_migration_state(conn, self.MIGRATION_DONE)
+
+        accounts = []
+        cur = conn.execute(
+            "SELECT id, email, password, recovery_email, totp_secret, notes,"
+            " tags, created_at, updated_at, extra FROM accounts ORDER BY seq")
+        for row in cur:
+            acc = dict(zip(self.COLUMNS, row[:-1]))
+            acc["tags"] = json.loads(acc["tags"])
+            if row[-1]:
+                acc.update(json.loads(row[-1]))
+            accounts.append(acc)
+        max_seq = conn.execute("SELECT MAX(seq) FROM accounts").fetchone()[0]
+        self._next_seq = 0 if max_seq is None else max_seq + 1
+        return accounts
+
+    def _set_migration_state(self, conn: sqlite3.Connection, state: int) -> None:
+        with conn:
+            conn.execute(f"PRAGMA user_version = {state}")
+
+    def _migrate_from_json(self, conn: sqlite3.Connection) -> None:
+        try:
+            accounts = read_json_snapshot(self.data_file)
+        except SNAPSHOT_ERRORS:
+            return  # still pending: retried on the next load
+        with conn:
+            # Negative seqs keep migrated accounts ahead of any added while
+            # an earlier attempt failed
+            for seq, acc in enumerate(accounts, start=-len(accounts)):
+                self._write_row(conn, acc, seq)
+            conn.execute(f"PRAGMA user_version = {self.MIGRATION_DONE}")
+
+    def _write_row(self, conn: sqlite3.Connection, acc: dict, seq: int | None) -> None:
+        extra = {k: v for k, v in acc.items() if k not in self.COLUMNS}
+        values = (
+            acc["id"], acc["email"], acc["email"].lower(),
+            acc.get("password", ""), acc.get("recovery_email", ""),
+            acc.get("totp_secret", ""), acc.get("notes", ""),
+            json.dumps(acc.get("tags", []), ensure_ascii=False),
+            acc.get("created_at", ""), acc.get("updated_at", ""),
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        # seq is only used when the row is new; updates keep their position
+        conn.execute(
+            "INSERT INTO accounts (id, email, email_lower, password,"
+            " recovery_email, totp_secret, notes, tags, created_at,"
+            " updated_at, extra, seq) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)"
+            " ON CONFLICT(id) DO UPDATE SET email=excluded.email,"
+            " email_lower=excluded.email_lower, password=excluded.password,"
+            " recovery_email=excluded.recovery_email,"
+            " totp_secret=excluded.totp_secret, notes=excluded.notes,"
+            " tags=excluded.tags, created_at=excluded.created_at,"
+            " updated_at=excluded.updated_at, extra=excluded.extra",
+            values + (seq,))
+        conn.execute("DELETE FROM account_tags WHERE account_id = ?", (acc["id"],))
+        conn.executemany(
+            "INSERT OR IGNORE INTO account_tags (account_id, tag) VALUES (?, ?)",
+            [(acc["id"], tag) for tag in acc.get("tags", [])])
+
+    def commit(self, get_accounts: Callable[[], list[dict]]) -> None:
+        if not self._pending:
+            return
+        conn = self._connect()
+        next_seq = self._next_seq
+        try:
+            with conn:
+                for acc_id, acc in self._pending.items():
+                    if acc is None:
+                        conn.execute("DELETE FROM accounts WHERE id = ?", (acc_id,))
+                    else:
+                        self._write_row(conn, acc, None)
+        except sqlite3.Error:
+            self._next_seq = next_seq
+            raise
+        self._pending.clear()
+
+    def save_all(self, accounts: list[dict]) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM accounts")
+            for seq, acc in enumerate(accounts):
+                self._write_row(conn, acc, seq)
+        self._next_seq = len(accounts)
+        self._pending.clear()
+
+
+STORAGE_ENGINES = {
+    "json": JsonStorage,
+    "journal": JournalStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+def create_storage(engine: str, data_file: str,
+                   snapshot_format: str = DEFAULT_SNAPSHOT_FORMAT):
+    try:
+        engine_class = STORAGE_ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown storage engine: {engine}") from None
+    return engine_class(data_file, snapshot_format)
@@ -0,0 +1,187 @@
+"""
+Background runner for slow local data work (Excel import/export, text
+import, backup, restore).
+
+The work function runs on a worker thread and must not touch widgets or
+mutate the AccountManager; it gets a Job handle to report progress and to
+check for cancellation. Progress and the result are handed back through a
+queue that the Tk thread polls with after(), the same pattern the parallel
+browser tabs use, so every callback runs on the Tk thread.
+
+A job can also stream intermediate items (e.g. chunks of parsed records)
+to the Tk thread with Job.emit(). The item queue is bounded, so a worker
+that runs ahead of the Tk side waits instead of piling up data.
+"""
+import queue
+import threading
+from typing import Callable
+
+# Items the worker may get ahead of the Tk thread
+MAX_PENDING_ITEMS = 2
+
+
+class JobCancelled(Exception):
+    """Raised by Job.check_cancelled() once the job has been cancelled."""
+
+
+class Job:
+    def __init__(self, name: str):
+        self.name = name
+        self._cancel_event = threading.Event()
+        self._messages: queue.Queue = queue.Queue()
+        self._items: queue.Queue = queue.Queue(maxsize=MAX_PENDING_ITEMS)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def check_cancelled(self) -> None:
+        """Call from the work function at safe points to honour cancel()."""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, done: int, total: int | None = None) -> None:
+        """Report progress from the worker thread."""
+        self._messages.put(("progress", done, total))
+
+    def emit(self, item) -> None:
+        """Hand *item* to on_item() on the Tk thread.
+
+        Blocks while the Tk side is behind; raises JobCancelled if the job
+        is cancelled meanwhile.
+        """
+        while True:
+            self.check_cancelled()
+            try:
+                self._items.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+class JobRunner:
+    """Runs one job at a time and delivers its callbacks on the Tk thread."""
+
+    def __init__(self, widget, poll_ms: int = 100,
+                 on_busy_changed: Callable[[bool], None] | None = None):
+        self._widget = widget
+        self._poll_ms = poll_ms
+        self._on_busy_changed = on_busy_changed
+        self._job: Job | None = None
+        self._callbacks: dict = {}
+        self._final = None          # result message, held until items drain
+        self._item_error = None     # exception raised by on_item
+
+    @property
+    def busy(self) -> bool:
+        return self._job is not None
+
+    def start(self, name: str, work: Callable[[Job], object],
+              on_done: Callable[[object], None],
+              on_error: Callable[[Exception], None] | None = None,
+              on_progress: Callable[[int, int | None], None] | None = None,
+              on_cancelled: Callable[[], None] | None = None,
+              on_item: Callable[[object], None] | None = None) -> Job:
+        """Run work(job) on a worker thread.
+
+        Exactly one of on_done(result), on_error(exc) or on_cancelled() is
+        called afterwards; on_progress(done, total) gets the latest progress
+        at most once per poll, and on_item(item) every emitted item in
+        order. If on_item raises, the job is cancelled and the exception
+        goes to on_error. Raises RuntimeError if a job is running.
+        """
+        if self._job is not None:
+            raise RuntimeError(f"任务进行中: {self._job.name}")
+        job = Job(name)
+        self._job = job
+        self._callbacks = {"done": on_done, "error": on_error,
+                           "progress": on_progress, "cancelled": on_cancelled,
+                           "item": on_item}
+        self._final = None
+        self._item_error = None
+        threading.Thread(target=self._run, args=(job, work),
+                         name=f"job-{name}", daemon=True).start()
+        if self._on_busy_changed:
+            self._on_busy_changed(True)
+        self._widget.after(self._poll_ms, self._poll)
+        return job
+
+    def cancel(self) -> None:
+        if self._job is not None:
+            self._job.cancel()
+
+    # ── Internal ───────────────────────────────────────────
+
+    @staticmethod
+    def _run(job: Job, work) -> None:
+        try:
+            result = work(job)
+        except JobCancelled:
+            job._messages.put(("cancelled",))
+        except Exception as e:
+            job._messages.put(("error", e))
+        else:
+            if job.cancelled:
+                job._messages.put(("cancelled",))
+            else:
+                job._messages.put(("done", result))
+
+    def _poll(self) -> None:
+        job = self._job
+        callbacks = self._callbacks
+
+        # At most a queue's worth of items per poll keeps the UI responsive
+        for _ in range(MAX_PENDING_ITEMS):
+            if job.cancelled:
+                break
+            try:
+                item = job._items.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callbacks["item"](item)
+            except Exception as e:
+                self._item_error = e
+                job.cancel()
+
+        latest_progress = None
+        try:
+            while self._final is None:
+                msg = job._messages.get_nowait()
+                if msg[0] == "progress":
+                    latest_progress = msg
+                else:
+                    self._final = msg
+        except queue.Empty:
+            pass
+        if latest_progress is not None and callbacks["progress"]:
+            callbacks["progress"](latest_progress[1], latest_progress[2])
+
+        # Items emitted before the work returned must be delivered first
+        if self._final is None or (not job.cancelled and not job._items.empty()):
+            self._widget.after(self._poll_ms, self._poll)
+            return
+
+        final, error = self._final, self._item_error
+        # Free the runner first so callbacks may start a follow-up job
+        self._job = None
+        self._callbacks = {}
+        self._final = None
+        self._item_error = None
+        if self._on_busy_changed:
+            self._on_busy_changed(False)
+        if error is not None:
+            final = ("error", error)
+        kind = final[0]
+        if kind == "done":
+            callbacks["done"](final[1])
+        elif kind == "error":
+            if callbacks["error"]:
+                callbacks["error"](final[1])
+            else:
+                raise final[1]
+        elif callbacks["cancelled"]:
+            callbacks["cancelled"]()
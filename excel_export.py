@@ -1,14 +1,33 @@
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from collections.abc import Iterable, Iterator, Mapping
+from itertools import chain, islice
+from typing import NamedTuple
+
+# openpyxl is imported inside the functions: it takes a noticeable part of
+# startup and is only needed once the user exports or imports a workbook
 
 HEADERS = ["账号邮箱", "密码", "辅助邮箱", "TOTP密钥", "备注", "创建时间", "更新时间"]
 FIELD_KEYS = ["email", "password", "recovery_email", "totp_secret", "notes", "created_at", "updated_at"]
 
 
-def export_to_excel(accounts: list[dict], filepath: str) -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Accounts"
+# Column widths are taken from the header and this many leading rows; a
+# write-only sheet must declare its columns before the first row
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COLUMN_WIDTH = 50
+
+
+def export_to_excel(accounts: Iterable[Mapping], filepath: str) -> int:
+    """Stream *accounts* into a new workbook and return the number written.
+
+    Uses openpyxl's write-only mode, so rows go straight to disk and
+    *accounts* may be any iterable, including a generator.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Accounts")
 
     header_font = Font(bold=True, color="FFFFFF", size=11)
     header_fill = PatternFill(start_color="2B579A", end_color="2B579A", fill_type="solid")
@@ -16,40 +35,100 @@ def export_to_excel(accounts: list[dict], filepath: str) -> None:
         bottom=Side(style="thin", color="D0D0D0"),
     )
 
-    for col_idx, header in enumerate(HEADERS, start=1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
+    rows = ([str(acc.get(key, "") or "") for key in FIELD_KEYS] for acc in accounts)
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+
+    widths = [len(header) for header in HEADERS]
+    for values in sample:
+        for col_idx, val in enumerate(values):
+            if len(val) > widths[col_idx]:
+                widths[col_idx] = len(val)
+    for col_idx, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 4, MAX_COLUMN_WIDTH)
+
+    header_cells = []
+    for header in HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
         cell.font = header_font
         cell.fill = header_fill
         cell.alignment = Alignment(horizontal="center")
+        header_cells.append(cell)
+    ws.append(header_cells)
 
-    for row_idx, acc in enumerate(accounts, start=2):
-        for col_idx, key in enumerate(FIELD_KEYS, start=1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=acc.get(key, ""))
-            cell.border = thin_border
+    # append() serializes a row before returning, so one styled cell per
+    # column can be refilled for every row
+    row_cells = []
+    for _ in FIELD_KEYS:
+        cell = WriteOnlyCell(ws)
+        cell.border = thin_border
+        row_cells.append(cell)
 
-    for col_idx, header in enumerate(HEADERS, start=1):
-        max_len = len(header)
-        for row in range(2, len(accounts) + 2):
-            val = str(ws.cell(row=row, column=col_idx).value or "")
-            max_len = max(max_len, len(val))
-        ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = min(max_len + 4, 50)
+    count = 0
+    for values in chain(sample, rows):
+        for cell, val in zip(row_cells, values):
+            cell.value = val
+        ws.append(row_cells)
+        count += 1
 
     wb.save(filepath)
+    return count
 
 
-def import_from_excel(filepath: str) -> list[dict]:
+class ExcelRow(NamedTuple):
+    row: int                # 1-based sheet row
+    account: dict | None    # normalized fields, or None when invalid
+    error: str
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Numeric passwords come back as floats
+        value = int(value)
+    return str(value).strip()
+
+
+def normalize_row(values) -> tuple[dict | None, str]:
+    """Turn one sheet row into account fields, or (None, reason)."""
+    acc = {}
+    for i, key in enumerate(FIELD_KEYS):
+        acc[key] = _cell_text(values[i]) if i < len(values) else ""
+    if "@" not in acc["email"]:
+        return None, f"邮箱格式无效: {acc['email']}"
+    # Base32 secrets are often copied in space-separated groups
+    acc["totp_secret"] = acc["totp_secret"].replace(" ", "").upper()
+    return acc, ""
+
+
+def iter_excel_rows(filepath: str) -> Iterator[ExcelRow]:
+    """Yield every non-blank data row of the first sheet, one at a time."""
+    from openpyxl import load_workbook
+
     wb = load_workbook(filepath, read_only=True)
-    ws = wb.active
-    accounts = []
-
-    rows = list(ws.iter_rows(min_row=2, values_only=True))
-    for row in rows:
-        if not row or not row[0]:
-            continue
-        acc = {}
-        for i, key in enumerate(FIELD_KEYS):
-            acc[key] = str(row[i]) if i < len(row) and row[i] is not None else ""
-        accounts.append(acc)
-
-    wb.close()
-    return accounts
+    try:
+        ws = wb.active
+        for row_no, values in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+            if not values or all(v is None or str(v).strip() == "" for v in values):
+                continue
+            acc, error = normalize_row(values)
+            yield ExcelRow(row_no, acc, error)
+    finally:
+        wb.close()
+
+
+def count_excel_rows(filepath: str) -> int | None:
+    """Data row count from the sheet dimensions, if the file records it."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filepath, read_only=True)
+    try:
+        max_row = wb.active.max_row
+    finally:
+        wb.close()
+    return max_row - 1 if max_row else None
+
+
+def import_from_excel(filepath: str) -> list[dict]:
+    """Return the valid accounts in the file, skipping invalid rows."""
+    return [r.account for r in iter_excel_rows(filepath) if r.account is not None]
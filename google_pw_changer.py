@@ -5,15 +5,18 @@ Supports TOTP 2FA automatically. Can also reset TOTP authenticator and retrieve
 DrissionPage controls real browser without CDP protocol, avoiding bot detection.
 """
 
+from __future__ import annotations
+
 import re
 import time
 import random
-from typing import Callable, Optional
-
-from DrissionPage import ChromiumPage, ChromiumOptions
+from typing import TYPE_CHECKING, Callable, Optional
 
 from totp_engine import TOTPEngine
 
+if TYPE_CHECKING:
+    from DrissionPage import ChromiumPage
+
 
 class GooglePasswordChanger:
     TIMEOUT = 15  # seconds per step
@@ -25,6 +28,10 @@ class GooglePasswordChanger:
 
     def _create_page(self) -> ChromiumPage:
         """Create a new ChromiumPage with stealth settings."""
+        # Imported here: DrissionPage is slow to load and only needed
+        # once a browser is actually started
+        from DrissionPage import ChromiumPage, ChromiumOptions
+
         co = ChromiumOptions()
         co.auto_port()
         if self.headless:
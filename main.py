@@ -3,6 +3,10 @@ Gemini Account Manager
 Entry point for the application.
 """
 import os
+import time
+
+# Cold start is measured from here to the first idle moment of the window
+_STARTED_AT = time.perf_counter()
 
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
@@ -10,7 +14,7 @@ from ui_main import MainApplication
 
 
 def main():
-    app = MainApplication()
+    app = MainApplication(started_at=_STARTED_AT)
     app.mainloop()
 
 
@@ -1,5 +1,117 @@
+import math
 import secrets
 import string
+from itertools import combinations
+from typing import NamedTuple
+
+SPECIAL_CHARS = "!@#$%^&*()-_=+[]{}|;:,.<>?"
+# Characters that are easy to misread when a password is typed by hand
+AMBIGUOUS_CHARS = "0O1lI|"
+
+
+class PasswordPolicy(NamedTuple):
+    length: int = 16
+    use_uppercase: bool = True
+    use_lowercase: bool = True
+    use_digits: bool = True
+    use_special: bool = True
+    exclude_ambiguous: bool = False
+    min_entropy: float = 0.0  # bits; 0 disables the check
+
+    def char_pools(self) -> list[str]:
+        pools = []
+        if self.use_uppercase:
+            pools.append(string.ascii_uppercase)
+        if self.use_lowercase:
+            pools.append(string.ascii_lowercase)
+        if self.use_digits:
+            pools.append(string.digits)
+        if self.use_special:
+            pools.append(SPECIAL_CHARS)
+        if self.exclude_ambiguous:
+            pools = ["".join(c for c in pool if c not in AMBIGUOUS_CHARS) for pool in pools]
+        return pools
+
+    def entropy_bits(self) -> float:
+        """Entropy of a password drawn uniformly under this policy.
+
+        Counts the passwords that contain every enabled class exactly
+        (inclusion-exclusion over the classes), which is the distribution
+        generate_passwords() samples from.
+        """
+        sizes = [len(pool) for pool in self.char_pools()]
+        total = sum(sizes)
+        valid = 0
+        for k in range(len(sizes) + 1):
+            for subset in combinations(sizes, k):
+                valid += (-1) ** k * (total - sum(subset)) ** self.length
+        return math.log2(valid) if valid > 0 else 0.0
+
+    def validate(self) -> None:
+        """Raise ValueError if no password can satisfy this policy."""
+        if self.length < 4:
+            raise ValueError("Password length must be at least 4")
+        pools = self.char_pools()
+        if not pools:
+            raise ValueError("At least one character type must be enabled")
+        if self.length < len(pools):
+            raise ValueError("Password is too short to contain every character type")
+        if self.min_entropy and self.entropy_bits() < self.min_entropy:
+            raise ValueError(
+                f"Policy entropy {self.entropy_bits():.0f} bits is below the "
+                f"minimum of {self.min_entropy:.0f} bits")
+
+
+def _generate(policy: PasswordPolicy, count: int) -> list[str]:
+    policy.validate()
+    pools = policy.char_pools()
+    length = policy.length
+    alphabet = "".join(pools)
+    size = len(alphabet)
+    limit = 256 - 256 % size
+    # bytes.translate maps and drops rejected bytes in one C-level pass
+    table = bytes(ord(alphabet[b % size]) for b in range(256))
+    rejected = bytes(range(limit, 256))
+    class_sets = [frozenset(pool) for pool in pools]
+
+    passwords: list[str] = []
+    while len(passwords) < count:
+        # Twice the bare minimum covers byte and class rejections on average
+        missing = count - len(passwords)
+        chars = secrets.token_bytes(missing * length * 2 + 64).translate(table, rejected)
+        chars = chars.decode("ascii")
+        for start in range(0, len(chars) - length + 1, length):
+            candidate = chars[start:start + length]
+            used = set(candidate)
+            if all(not used.isdisjoint(cls) for cls in class_sets):
+                passwords.append(candidate)
+                if len(passwords) == count:
+                    break
+    return passwords
+
+
+def generate_passwords(
+    count: int,
+    length: int = 16,
+    use_uppercase: bool = True,
+    use_lowercase: bool = True,
+    use_digits: bool = True,
+    use_special: bool = True,
+    policy: PasswordPolicy | None = None,
+) -> list[str]:
+    """Generate *count* cryptographically secure random passwords.
+
+    Pass *policy* to use a PasswordPolicy instead of the individual
+    options. Random bytes are drawn in bulk and mapped onto the alphabet
+    with rejection sampling (bytes above the largest multiple of the
+    alphabet size are dropped), so every character is uniform. Candidates
+    missing an enabled character class are rejected as a whole, which
+    keeps the result uniform over all passwords that contain every class.
+    """
+    if policy is None:
+        policy = PasswordPolicy(length, use_uppercase, use_lowercase,
+                                use_digits, use_special)
+    return _generate(policy, count)
 
 
 def generate_password(
@@ -8,39 +120,8 @@ def generate_password(
     use_lowercase: bool = True,
     use_digits: bool = True,
     use_special: bool = True,
+    policy: PasswordPolicy | None = None,
 ) -> str:
     """Generate a cryptographically secure random password."""
-    if length < 4:
-        raise ValueError("Password length must be at least 4")
-
-    char_pools = []
-    required_chars = []
-
-    if use_uppercase:
-        pool = string.ascii_uppercase
-        char_pools.append(pool)
-        required_chars.append(secrets.choice(pool))
-    if use_lowercase:
-        pool = string.ascii_lowercase
-        char_pools.append(pool)
-        required_chars.append(secrets.choice(pool))
-    if use_digits:
-        pool = string.digits
-        char_pools.append(pool)
-        required_chars.append(secrets.choice(pool))
-    if use_special:
-        pool = "!@#$%^&*()-_=+[]{}|;:,.<>?"
-        char_pools.append(pool)
-        required_chars.append(secrets.choice(pool))
-
-    if not char_pools:
-        raise ValueError("At least one character type must be enabled")
-
-    all_chars = "".join(char_pools)
-    remaining = length - len(required_chars)
-    password_chars = required_chars + [secrets.choice(all_chars) for _ in range(remaining)]
-
-    rng = secrets.SystemRandom()
-    rng.shuffle(password_chars)
-
-    return "".join(password_chars)
+    return generate_passwords(1, length, use_uppercase, use_lowercase,
+                              use_digits, use_special, policy=policy)[0]
@@ -0,0 +1,73 @@
+"""
+Substring search over the account store.
+
+Each account is reduced once, on add/update, to a lowercase haystack made
+of its email, recovery email, notes and tags. A query is then a plain
+``in`` test per haystack, with no lowercasing or field access at search
+time.
+
+While the user keeps typing, each query usually extends the previous one.
+Every account matching "abc" also matches "ab", so the previous result is
+kept and only its matches are re-checked. Any change to the store clears
+that cache.
+"""
+
+
+# Joins fields so that a query cannot match across two of them
+_FIELD_SEP = "\x00"
+
+
+def build_haystack(acc) -> str:
+    return _FIELD_SEP.join((
+        acc.get("email", ""),
+        acc.get("recovery_email", ""),
+        acc.get("notes", ""),
+        _FIELD_SEP.join(acc.get("tags", [])),
+    )).lower()
+
+
+class SearchIndex:
+    def __init__(self):
+        # account id -> haystack, in store (import) order
+        self._haystacks: dict[str, str] = {}
+        self._last_query = ""
+        self._last_result: list[str] | None = None
+
+    def rebuild(self, accounts) -> None:
+        self._haystacks = {acc["id"]: build_haystack(acc) for acc in accounts}
+        self._invalidate()
+
+    def add(self, acc) -> None:
+        self._haystacks[acc["id"]] = build_haystack(acc)
+        self._invalidate()
+
+    def update(self, acc) -> None:
+        haystack = build_haystack(acc)
+        if self._haystacks.get(acc["id"]) != haystack:
+            self._haystacks[acc["id"]] = haystack
+            self._invalidate()
+
+    def remove(self, account_id: str) -> None:
+        if self._haystacks.pop(account_id, None) is not None:
+            self._invalidate()
+
+    def search(self, query: str) -> list[str]:
+        """Return ids of accounts containing *query*, in store order."""
+        q = query.lower()
+        if not q:
+            return list(self._haystacks)
+
+        if self._last_result is not None and self._last_query in q:
+            # Narrow the previous result instead of scanning everything
+            haystacks = self._haystacks
+            result = [acc_id for acc_id in self._last_result if q in haystacks[acc_id]]
+        else:
+            result = [acc_id for acc_id, hay in self._haystacks.items() if q in hay]
+
+        self._last_query = q
+        self._last_result = result
+        return list(result)
+
+    def _invalidate(self) -> None:
+        self._last_query = ""
+        self._last_result = None
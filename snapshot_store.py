@@ -0,0 +1,358 @@
+"""
+Local point-in-time snapshots of the account store.
+
+Everything a snapshot needs is content-addressed by a BLAKE2b digest of
+its compact JSON and stored once:
+
+- accounts, in packs/<name>.accounts.gz;
+- chunks of the snapshot's [account id, digest] list, in
+  packs/<name>.chunks.gz. Chunk boundaries depend on the entries
+  themselves (an entry whose digest ends in CHUNK_MARK closes a chunk), so
+  an edit, insert or delete only changes the chunk around it.
+
+Each pack holds the objects first stored by snapshot <name> (or
+<name>~<n> once rewritten) and has a .idx file listing their digests. <name>.manifest lists the snapshot's
+chunk digests and catalog.json the kept snapshots (SnapshotInfo fields).
+A snapshot therefore costs the changed accounts and chunks plus a small
+manifest, and an unchanged store adds nothing. Diffs skip the chunks two
+snapshots share and never read an account; restoring reads one manifest
+and the packs it references.
+
+prune() applies the RetentionPolicy, then deletes packs no kept snapshot
+references and rewrites those that are at least half unreferenced (a
+smaller share is cheaper to keep than to rewrite). The catalog is written
+last, so a crash mid-snapshot leaves only orphan files, which the next
+prune() that drops a snapshot removes.
+"""
+import gzip
+import os
+import threading
+from datetime import datetime
+from hashlib import blake2b
+from typing import Iterable, NamedTuple
+
+from account_storage import dumps_json, loads_json, write_file_atomic
+
+CATALOG_FILE = "catalog.json"
+PACK_DIR = "packs"
+# Digest suffix that ends a chunk: about one entry in 256
+CHUNK_MARK = "00"
+# gzip level for packs; higher levels cost far more time for little gain
+COMPRESS_LEVEL = 6
+
+
+class RetentionPolicy(NamedTuple):
+    keep_last: int = 10     # newest snapshots kept unconditionally
+    keep_daily: int = 7     # days (most recent first) whose last snapshot is kept
+
+    def select(self, infos: list["SnapshotInfo"]) -> set[str]:
+        """Names of the snapshots in *infos* (oldest first) to keep."""
+        newest_first = infos[::-1]
+        keep = {info.name for info in newest_first[:max(self.keep_last, 1)]}
+        days: set[str] = set()
+        for info in newest_first:
+            day = info.created_at[:10]
+            if day not in days:
+                if len(days) == self.keep_daily:
+                    break
+                days.add(day)
+                keep.add(info.name)
+        return keep
+
+
+class SnapshotInfo(NamedTuple):
+    name: str
+    created_at: str     # ISO timestamp
+    label: str
+    count: int          # accounts in the snapshot
+    stored: int         # accounts this snapshot added to the packs
+    root: str           # digest over all chunks; equal roots mean equal stores
+
+
+class SnapshotDiff(NamedTuple):
+    added: list[str]    # account ids
+    removed: list[str]
+    changed: list[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.changed)}"
+
+
+def _digest(data: bytes) -> str:
+    return blake2b(data, digest_size=16).hexdigest()
+
+
+def _diff_entries(old: Iterable, new: Iterable) -> SnapshotDiff:
+    old_map, new_map = dict(old), dict(new)
+    added = [acc_id for acc_id in new_map if acc_id not in old_map]
+    removed = [acc_id for acc_id in old_map if acc_id not in new_map]
+    changed = [acc_id for acc_id, digest in new_map.items()
+               if acc_id in old_map and old_map[acc_id] != digest]
+    return SnapshotDiff(added, removed, changed)
+
+
+def _encode(accounts: list[dict]) -> tuple[list[str], dict[str, bytes], dict[str, bytes]]:
+    """(chunk digests, {chunk digest: JSON}, {account digest: JSON}) for *accounts*."""
+    chunk_digests, chunks, objects = [], {}, {}
+    chunk: list[list[str]] = []
+
+    def close_chunk():
+        data = dumps_json(chunk)
+        digest = _digest(data)
+        chunk_digests.append(digest)
+        chunks[digest] = data
+
+    for acc in accounts:
+        data = dumps_json(acc)
+        digest = _digest(data)
+        objects[digest] = data
+        chunk.append([acc["id"], digest])
+        if digest.endswith(CHUNK_MARK):
+            close_chunk()
+            chunk = []
+    if chunk:
+        close_chunk()
+    return chunk_digests, chunks, objects
+
+
+class _PackSet:
+    """One kind of content-addressed object, one gzip pack per snapshot."""
+
+    def __init__(self, directory: str, kind: str):
+        self.directory = directory
+        self.kind = kind
+        self._index: dict[str, str] | None = None   # digest -> pack name
+
+    def _path(self, name: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{name}.{self.kind}{ext}")
+
+    def _files(self, ext: str) -> list[str]:
+        """Pack names that have a file with *ext*."""
+        suffix = f".{self.kind}{ext}"
+        if not os.path.isdir(self.directory):
+            return []
+        return [file_name[:-len(suffix)] for file_name in os.listdir(self.directory)
+                if file_name.endswith(suffix)]
+
+    def index(self) -> dict[str, str]:
+        if self._index is None:
+            self._index = {}
+            for name in self._files(".idx"):
+                with open(self._path(name, ".idx"), "r", encoding="ascii") as f:
+                    self._index.update(dict.fromkeys(f.read().split(), name))
+        return self._index
+
+    def add(self, name: str, objects: dict[str, bytes]) -> None:
+        """Write the already encoded *objects* as pack *name*."""
+        os.makedirs(self.directory, exist_ok=True)
+        body = b",".join(b'"%s":%s' % (digest.encode(), data) for digest, data in objects.items())
+        write_file_atomic(self._path(name, ".gz"),
+                          gzip.compress(b"{" + body + b"}", COMPRESS_LEVEL, mtime=0))
+        # The index goes last: a digest listed there is always readable
+        write_file_atomic(self._path(name, ".idx"), "\n".join(objects).encode("ascii"))
+        self.index().update(dict.fromkeys(objects, name))
+
+    def read(self, digests: Iterable[str]) -> dict:
+        """{digest: object}, covering at least *digests*."""
+        index = self.index()
+        objects: dict = {}
+        for name in {index[digest] for digest in digests}:
+            objects.update(self._read_pack(name))
+        return objects
+
+    def _read_pack(self, name: str) -> dict:
+        with open(self._path(name, ".gz"), "rb") as f:
+            return loads_json(gzip.decompress(f.read()))
+
+    def collect(self, live: set[str]) -> None:
+        """Drop packs (mostly) made of digests outside *live*.
+
+        A pack worth keeping part of is rewritten under a new name; the old
+        one is deleted only after the new index is written, so every listed
+        digest stays readable.
+        """
+        index = self.index()
+        by_pack: dict[str, list[str]] = {}
+        for digest, name in index.items():
+            by_pack.setdefault(name, []).append(digest)
+        for name in set(self._files(".gz")) | set(self._files(".idx")):
+            # A pack without an index, or whose digests all resolve to a
+            # newer pack after an interrupted rewrite, is unreachable
+            if name not in by_pack:
+                self._remove(name)
+        for name, digests in by_pack.items():
+            dead = [digest for digest in digests if digest not in live]
+            if len(dead) * 2 < len(digests):
+                continue
+            for digest in dead:
+                del index[digest]
+            if len(dead) < len(digests):
+                kept = {digest: dumps_json(obj) for digest, obj in self._read_pack(name).items()
+                        if digest in live}
+                self.add(self._rewrite_name(name), kept)
+            self._remove(name)
+
+    def _rewrite_name(self, name: str) -> str:
+        """Next free <snapshot name>~<n> for a rewrite of pack *name*."""
+        base, _, rev = name.partition("~")
+        n = int(rev or 0) + 1
+        while os.path.exists(self._path(f"{base}~{n}", ".gz")) or \
+                os.path.exists(self._path(f"{base}~{n}", ".idx")):
+            n += 1
+        return f"{base}~{n}"
+
+    def _remove(self, name: str) -> None:
+        # Index first, so a crash never leaves a listed digest unreadable
+        for ext in (".idx", ".gz"):
+            try:
+                os.remove(self._path(name, ext))
+            except FileNotFoundError:
+                pass
+
+
+class SnapshotStore:
+    """Snapshot directory access. Methods are thread-safe, so they can run in background jobs."""
+
+    def __init__(self, directory: str, retention: RetentionPolicy = RetentionPolicy()):
+        self.directory = directory
+        self.retention = retention
+        pack_dir = os.path.join(directory, PACK_DIR)
+        self._accounts = _PackSet(pack_dir, "accounts")
+        self._chunks = _PackSet(pack_dir, "chunks")
+        self._lock = threading.RLock()
+        self._catalog: list[SnapshotInfo] | None = None
+
+    # ── Public API ─────────────────────────────────────────
+
+    def list_snapshots(self) -> list[SnapshotInfo]:
+        """Kept snapshots, newest first."""
+        with self._lock:
+            return self._load_catalog()[::-1]
+
+    def create(self, accounts: list[dict], label: str = "") -> SnapshotInfo | None:
+        """Snapshot *accounts* (e.g. AccountManager.snapshot()) and prune.
+
+        Returns None without writing anything if the store is unchanged
+        since the latest snapshot.
+        """
+        chunk_digests, chunks, objects = _encode(accounts)
+        root = _digest(",".join(chunk_digests).encode())
+        with self._lock:
+            catalog = self._load_catalog()
+            if catalog and catalog[-1].root == root:
+                return None
+            name = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            known = self._accounts.index()
+            new_objects = {digest: data for digest, data in objects.items() if digest not in known}
+            if new_objects:
+                self._accounts.add(name, new_objects)
+            known = self._chunks.index()
+            new_chunks = {digest: data for digest, data in chunks.items() if digest not in known}
+            if new_chunks:
+                self._chunks.add(name, new_chunks)
+            write_file_atomic(self._manifest_path(name), dumps_json(chunk_digests))
+            info = SnapshotInfo(name, datetime.now().isoformat(timespec="seconds"),
+                                label, len(accounts), len(new_objects), root)
+            catalog.append(info)
+            self._save_catalog()
+            self.prune()
+            return info
+
+    def restore(self, name: str) -> list[dict]:
+        """The account list of snapshot *name*, for AccountManager.restore_accounts()."""
+        with self._lock:
+            entries = self._entries(self._read_manifest(name))
+            objects = self._accounts.read(digest for _, digest in entries)
+            return [objects[digest] for _, digest in entries]
+
+    def diff(self, old: str | None, new: str) -> SnapshotDiff:
+        """Changes from snapshot *old* (None: an empty store) to snapshot *new*."""
+        with self._lock:
+            old_chunks = self._read_manifest(old) if old else []
+            return self._diff_chunks(old_chunks, self._read_manifest(new))
+
+    def diff_with(self, name: str, accounts: list[dict]) -> SnapshotDiff:
+        """Changes restoring snapshot *name* would make to *accounts*."""
+        current_digests, current_chunks, _ = _encode(accounts)
+        with self._lock:
+            new_digests = self._read_manifest(name)
+            shared = set(current_digests).intersection(new_digests)
+            current = [entry for digest in current_digests if digest not in shared
+                       for entry in loads_json(current_chunks[digest])]
+            return _diff_entries(current, self._entries(new_digests, skip=shared))
+
+    def history(self) -> list[tuple[SnapshotInfo, SnapshotDiff]]:
+        """Kept snapshots newest first, each with its diff from the one before."""
+        with self._lock:
+            result, previous = [], []
+            for info in self._load_catalog():
+                chunk_digests = self._read_manifest(info.name)
+                result.append((info, self._diff_chunks(previous, chunk_digests)))
+                previous = chunk_digests
+            return result[::-1]
+
+    def prune(self) -> list[str]:
+        """Apply the retention policy; return the names of removed snapshots."""
+        with self._lock:
+            catalog = self._load_catalog()
+            keep = self.retention.select(catalog)
+            removed = [info.name for info in catalog if info.name not in keep]
+            if removed:
+                self._catalog = [info for info in catalog if info.name in keep]
+                self._save_catalog()
+                self._collect_garbage()
+            return removed
+
+    # ── Internal ───────────────────────────────────────────
+
+    def _manifest_path(self, name: str) -> str:
+        return os.path.join(self.directory, name + ".manifest")
+
+    def _load_catalog(self) -> list[SnapshotInfo]:
+        if self._catalog is None:
+            path = os.path.join(self.directory, CATALOG_FILE)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    self._catalog = [SnapshotInfo(**item) for item in loads_json(f.read())]
+            else:
+                self._catalog = []
+        return self._catalog
+
+    def _save_catalog(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        write_file_atomic(os.path.join(self.directory, CATALOG_FILE),
+                          dumps_json([info._asdict() for info in self._catalog], indent=True))
+
+    def _read_manifest(self, name: str) -> list[str]:
+        with open(self._manifest_path(name), "rb") as f:
+            return loads_json(f.read())
+
+    def _entries(self, chunk_digests: list[str], skip: set[str] = frozenset()) -> list:
+        """The [account id, digest] entries of the chunks not in *skip*."""
+        wanted = [digest for digest in chunk_digests if digest not in skip]
+        chunks = self._chunks.read(wanted)
+        return [entry for digest in wanted for entry in chunks[digest]]
+
+    def _diff_chunks(self, old: list[str], new: list[str]) -> SnapshotDiff:
+        # Chunks both sides share hold identical entries: no difference there
+        shared = set(old).intersection(new)
+        return _diff_entries(self._entries(old, shared), self._entries(new, shared))
+
+    def _collect_garbage(self) -> None:
+        """Delete files of dropped snapshots and pack entries nothing references."""
+        names = {info.name for info in self._catalog}
+        live_chunks: set[str] = set()
+        for name in names:
+            live_chunks.update(self._read_manifest(name))
+        for file_name in os.listdir(self.directory):
+            name, ext = os.path.splitext(file_name)
+            if ext == ".manifest" and name not in names:
+                os.remove(os.path.join(self.directory, file_name))
+        chunks = self._chunks.read(live_chunks)
+        live_accounts = {digest for chunk_digest in live_chunks
+                         for _, digest in chunks[chunk_digest]}
+        self._chunks.collect(live_chunks)
+        self._accounts.collect(live_accounts)
@@ -0,0 +1,125 @@
+"""
+Account orderings kept sorted as the store changes, so list reads never
+re-sort.
+
+An OrderIndex holds one (key..., id) entry per account in a list of short
+sorted sublists. Inserting or removing an entry bisects to its sublist and
+shifts at most 2 * LOAD entries inside it, instead of re-sorting (or
+shifting) the whole store. Positional reads bisect a table of sublist
+start offsets that is rebuilt lazily after mutations.
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable, Mapping
+from itertools import accumulate
+
+# Target sublist length; a sublist is split once it doubles
+LOAD = 500
+
+
+class OrderIndex:
+    def __init__(self):
+        self._lists: list[list[tuple]] = []
+        self._maxes: list[tuple] = []       # last entry of each sublist
+        self._entries: dict[str, tuple] = {}
+        self._offsets: list[int] | None = None  # sublist start positions
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, keys: Mapping[str, tuple]) -> None:
+        """Replace the contents with {id: key}."""
+        self._entries = {acc_id: key + (acc_id,) for acc_id, key in keys.items()}
+        ordered = sorted(self._entries.values())
+        self._lists = [ordered[i:i + LOAD] for i in range(0, len(ordered), LOAD)]
+        self._maxes = [sub[-1] for sub in self._lists]
+        self._offsets = None
+
+    def set(self, acc_id: str, key: tuple) -> None:
+        """Insert *acc_id* or move it to its position for a changed key."""
+        entry = key + (acc_id,)
+        old = self._entries.get(acc_id)
+        if old == entry:
+            return
+        if old is not None:
+            self._remove_entry(old)
+        self._entries[acc_id] = entry
+        self._insert_entry(entry)
+
+    def remove(self, acc_id: str) -> None:
+        old = self._entries.pop(acc_id, None)
+        if old is not None:
+            self._remove_entry(old)
+
+    def range(self, start: int = 0, stop: int | None = None,
+              reverse: bool = False) -> list[str]:
+        """Ids at positions [start, stop), counted from the end if *reverse*."""
+        total = len(self._entries)
+        start, stop, _ = slice(start, stop).indices(total)
+        if start >= stop:
+            return []
+        if reverse:
+            start, stop = total - stop, total - start
+        wanted = stop - start
+        ids: list[str] = []
+        i, pos = self._locate(start)
+        while len(ids) < wanted:
+            sub = self._lists[i]
+            ids.extend(entry[-1] for entry in sub[pos:pos + wanted - len(ids)])
+            i, pos = i + 1, 0
+        if reverse:
+            ids.reverse()
+        return ids
+
+    def sort_ids(self, ids: Iterable[str], reverse: bool = False) -> list[str]:
+        """*ids* (all indexed) arranged in this order."""
+        ids = list(ids)
+        if len(ids) * 8 > len(self._entries):
+            # A large share of the store: filtering the order is cheaper
+            wanted = set(ids)
+            result = [entry[-1] for sub in self._lists for entry in sub
+                      if entry[-1] in wanted]
+        else:
+            result = sorted(ids, key=self._entries.__getitem__)
+        if reverse:
+            result.reverse()
+        return result
+
+    # ── Internal ───────────────────────────────────────────
+
+    def _insert_entry(self, entry: tuple) -> None:
+        self._offsets = None
+        maxes = self._maxes
+        if not maxes:
+            self._lists.append([entry])
+            maxes.append(entry)
+            return
+        if entry > maxes[-1]:
+            # Past the current end: the common case for new accounts
+            i = len(maxes) - 1
+            self._lists[i].append(entry)
+            maxes[i] = entry
+        else:
+            i = bisect_left(maxes, entry)
+            insort(self._lists[i], entry)
+        sub = self._lists[i]
+        if len(sub) > 2 * LOAD:
+            self._lists[i:i + 1] = [sub[:LOAD], sub[LOAD:]]
+            self._maxes[i:i + 1] = [sub[LOAD - 1], sub[-1]]
+
+    def _remove_entry(self, entry: tuple) -> None:
+        self._offsets = None
+        i = bisect_left(self._maxes, entry)
+        sub = self._lists[i]
+        del sub[bisect_left(sub, entry)]
+        if sub:
+            self._maxes[i] = sub[-1]
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """(sublist, position in it) of the entry at *index*."""
+        if self._offsets is None:
+            self._offsets = list(accumulate((len(sub) for sub in self._lists[:-1]), initial=0))
+        i = bisect_right(self._offsets, index) - 1
+        return i, index - self._offsets[i]
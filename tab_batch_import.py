@@ -1,18 +1,32 @@
+import os
+from itertools import islice
+
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 
 from account_manager import AccountManager
+from background_job import JobRunner
+from batch_parser import (BatchParser, BatchParseResult, format_errors,
+                          iter_file_lines, parse_batch_lines)
 from ui_account_selector import AccountSelectionPanel
 
 
+# Lines between progress updates (and cancel checks) while parsing
+PARSE_PROGRESS_EVERY = 5000
+# File import: lines shown in the preview, and lines committed per batch
+FILE_PREVIEW_LINES = 20
+FILE_CHUNK_LINES = 10000
+
+
 class BatchImportTab:
     """批量导入 Tab：支持重复账号检测（跳过/覆盖/逐一确认）。"""
 
     def __init__(self, parent, account_manager: AccountManager,
-                 status_callback, on_import_done):
+                 status_callback, on_import_done, job_runner: JobRunner):
         self.account_manager = account_manager
         self.status_callback = status_callback
         self.on_import_done = on_import_done  # callable: refresh list + count
+        self.job_runner = job_runner
 
         parent.grid_columnconfigure(0, weight=1)
         parent.grid_columnconfigure(1, weight=2)
@@ -51,6 +65,10 @@ class BatchImportTab:
                       font=ctk.CTkFont(size=13),
                       fg_color="gray60", hover_color="gray50",
                       command=self._on_load_existing).pack(side="left", padx=(10, 0))
+        ctk.CTkButton(btn_frame, text="📂 从文件导入", width=120, height=36,
+                      font=ctk.CTkFont(size=13),
+                      fg_color="gray60", hover_color="gray50",
+                      command=self._on_import_file).pack(side="left", padx=(10, 0))
         ctk.CTkButton(btn_frame, text="清空", width=80, height=36,
                       fg_color=("gray70", "gray35"), hover_color=("gray60", "gray45"),
                       command=lambda: self.textbox.delete("1.0", "end")
@@ -73,32 +91,52 @@ class BatchImportTab:
         self.status_callback(f"已加载 {len(accounts)} 个选中账号")
 
     def _on_import(self):
+        if self.job_runner.busy:
+            messagebox.showinfo("提示", "已有后台任务在进行中，请稍候或先取消")
+            return
         text = self.textbox.get("1.0", "end").strip()
         if not text:
             messagebox.showwarning("提示", "请先粘贴账号数据")
             return
 
-        parsed_lines = []
-        skipped_parse = 0
-        for line in text.splitlines():
-            parsed = AccountManager.parse_batch_line(line)
-            if parsed:
-                parsed_lines.append(parsed)
-            else:
-                skipped_parse += 1
+        def work(job):
+            """Parse the pasted text off the Tk thread."""
+            lines = text.splitlines()
+            parser = BatchParser()
+            records = []
+            for start in range(0, len(lines), PARSE_PROGRESS_EVERY):
+                job.check_cancelled()
+                records += parser.feed(lines[start:start + PARSE_PROGRESS_EVERY])
+                job.progress(parser.line_count, len(lines))
+            return parser.result(records)
+
+        def on_progress(done: int, total: int | None):
+            self.status_callback(f"正在解析... {done}/{total}")
+
+        self.status_callback("正在解析...")
+        self.job_runner.start(
+            "批量导入", work, self._on_parsed,
+            on_error=lambda e: messagebox.showerror("导入失败", str(e)),
+            on_progress=on_progress,
+            on_cancelled=lambda: self.status_callback("已取消批量导入"),
+        )
 
-        if not parsed_lines:
-            messagebox.showwarning("提示", f"未解析到有效行（跳过 {skipped_parse} 行）")
+    def _on_parsed(self, result: BatchParseResult):
+        invalid = len(result.errors) + len(result.duplicates)
+        if not result.records:
+            messagebox.showwarning("提示", f"未解析到有效行（无效或重复 {invalid} 行）"
+                                   + format_errors(result.errors))
             return
 
         # Classify: new vs duplicate
-        existing_emails = {acc["email"] for acc in self.account_manager.get_all_accounts()}
-        new_lines = [p for p in parsed_lines if p["email"] not in existing_emails]
-        dup_lines = [p for p in parsed_lines if p["email"] in existing_emails]
+        has_email = self.account_manager.has_email
+        new_lines, dup_lines = [], []
+        for rec in result.records:
+            (dup_lines if has_email(rec.email) else new_lines).append(rec)
 
         # If no duplicates, just import
         if not dup_lines:
-            self._do_import(new_lines, [], "skip")
+            self._do_import(new_lines, [], "skip", invalid)
             return
 
         # Ask user how to handle duplicates
@@ -110,9 +148,9 @@ class BatchImportTab:
             overwrite_list = self._confirm_each(dup_lines)
             if overwrite_list is None:
                 return
-            self._do_import(new_lines, overwrite_list, "overwrite_list")
+            self._do_import(new_lines, overwrite_list, "overwrite_list", invalid)
         else:
-            self._do_import(new_lines, dup_lines, strategy)
+            self._do_import(new_lines, dup_lines, strategy, invalid)
 
     def _ask_dup_strategy(self, new_count: int, dup_lines: list) -> str | None:
         """Show a dialog to choose duplicate handling strategy.
@@ -132,7 +170,7 @@ class BatchImportTab:
                      ).pack(padx=20, pady=(20, 10))
 
         # Show first few duplicates
-        preview = "\n".join(p["email"] for p in dup_lines[:5])
+        preview = "\n".join(p.email for p in dup_lines[:5])
         if len(dup_lines) > 5:
             preview += f"\n...等共 {len(dup_lines)} 个"
         ctk.CTkLabel(dialog, text=preview, font=ctk.CTkFont(family="Consolas", size=11),
@@ -183,7 +221,7 @@ class BatchImportTab:
 
         for p in dup_lines:
             var = ctk.BooleanVar(value=False)
-            ctk.CTkCheckBox(scroll, text=p["email"], variable=var,
+            ctk.CTkCheckBox(scroll, text=p.email, variable=var,
                             font=ctk.CTkFont(size=12), height=30,
                             corner_radius=4).pack(fill="x", pady=1)
             check_vars.append((p, var))
@@ -205,18 +243,11 @@ class BatchImportTab:
         dialog.wait_window()
         return result[0]
 
-    def _do_import(self, new_lines: list, dup_lines: list, strategy: str):
+    def _do_import(self, new_lines: list, dup_lines: list, strategy: str, invalid: int = 0):
         """Perform the actual import."""
         imported = 0
         updated = 0
 
-        for p in new_lines:
-            self.account_manager.add_account(
-                email=p["email"], password=p["password"],
-                recovery_email=p["recovery_email"], totp_secret=p["totp_secret"],
-            )
-            imported += 1
-
         if strategy == "overwrite":
             overwrite_targets = dup_lines
         elif strategy == "overwrite_list":
@@ -224,22 +255,26 @@ class BatchImportTab:
         else:
             overwrite_targets = []
 
-        if overwrite_targets:
-            all_accs = self.account_manager.get_all_accounts()
-            email_to_id = {acc["email"]: acc["id"] for acc in all_accs}
-            for p in overwrite_targets:
-                acc_id = email_to_id.get(p["email"])
-                if acc_id:
-                    fields = {}
-                    if p["password"]:
-                        fields["password"] = p["password"]
-                    if p["recovery_email"]:
-                        fields["recovery_email"] = p["recovery_email"]
-                    if p["totp_secret"]:
-                        fields["totp_secret"] = p["totp_secret"]
-                    if fields:
-                        self.account_manager.update_account(acc_id, **fields)
-                        updated += 1
+        try:
+            with self.account_manager.batch():
+                imported = self.account_manager.add_accounts(new_lines)
+
+                for p in overwrite_targets:
+                    acc_id = self.account_manager.get_account_id(p.email)
+                    if acc_id:
+                        fields = {}
+                        if p.password:
+                            fields["password"] = p.password
+                        if p.recovery_email:
+                            fields["recovery_email"] = p.recovery_email
+                        if p.totp_secret:
+                            fields["totp_secret"] = p.totp_secret
+                        if fields:
+                            self.account_manager.update_account(acc_id, **fields)
+                            updated += 1
+        except Exception as e:
+            messagebox.showerror("导入失败", f"导入已回滚，未写入任何数据：\n{e}")
+            return
 
         self.on_import_done()
         skipped = len(dup_lines) - updated if strategy != "overwrite_list" else 0
@@ -248,5 +283,173 @@ class BatchImportTab:
             msg += f"，覆盖 {updated} 个"
         if skipped:
             msg += f"，跳过重复 {skipped} 个"
+        if invalid:
+            msg += f"，无效或重复行 {invalid} 行"
         self.result_var.set(msg)
         self.status_callback(f"批量导入 {imported} 个账号")
+
+    # ── Import from file ───────────────────────────────────────
+
+    def _on_import_file(self):
+        """Stream a .txt/.csv file into the store without going through the textbox."""
+        if self.job_runner.busy:
+            messagebox.showinfo("提示", "已有后台任务在进行中，请稍候或先取消")
+            return
+        path = filedialog.askopenfilename(
+            title="选择导入文件",
+            filetypes=[("文本 / CSV 文件", "*.txt *.csv"), ("所有文件", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            sample_lines = iter_file_lines(path)
+            sample = parse_batch_lines(islice(sample_lines, FILE_PREVIEW_LINES))
+            sample_lines.close()
+        except OSError as e:
+            messagebox.showerror("错误", f"无法读取文件:\n{e}")
+            return
+        overwrite = self._ask_file_import(path, sample)
+        if overwrite is None:
+            return
+
+        stats = {"added": 0, "updated": 0, "skipped": 0}
+
+        def work(job):
+            parser = BatchParser()
+            lines = iter_file_lines(path)
+            try:
+                while True:
+                    chunk = list(islice(lines, FILE_CHUNK_LINES))
+                    if not chunk:
+                        break
+                    job.check_cancelled()
+                    records = parser.feed(chunk)
+                    if records:
+                        job.emit(records)
+                    job.progress(parser.line_count)
+            finally:
+                lines.close()
+            # Records went out through emit(); only the diagnostics are left
+            return parser.result([])
+
+        def on_progress(done: int, total: int | None):
+            self.status_callback(f"正在从文件导入... 已读取 {done} 行，"
+                                 f"新增 {stats['added']} 个")
+
+        def on_done(result: BatchParseResult):
+            msg = self._file_import_summary(stats, result)
+            self.result_var.set(msg)
+            self.status_callback(f"文件导入完成：新增 {stats['added']} 个")
+            messagebox.showinfo("导入完成", msg + format_errors(result.errors))
+
+        def on_error(e: Exception):
+            self.status_callback("文件导入失败")
+            messagebox.showerror("导入失败",
+                                 f"已写入的批次保留（新增 {stats['added']} 个），"
+                                 f"当前批次已回滚：\n{e}")
+
+        def on_cancelled():
+            self.result_var.set(f"已取消，此前已新增 {stats['added']} 个")
+            self.status_callback("已取消文件导入")
+
+        self.status_callback("正在从文件导入...")
+        self.job_runner.start(
+            "文件导入", work, on_done, on_error=on_error,
+            on_progress=on_progress, on_cancelled=on_cancelled,
+            on_item=lambda records: self._commit_file_chunk(records, overwrite, stats),
+        )
+
+    def _commit_file_chunk(self, records: list, overwrite: bool, stats: dict):
+        """Write one chunk of parsed records in a single commit."""
+        get_account_id = self.account_manager.get_account_id
+        new_records, existing = [], []
+        for rec in records:
+            acc_id = get_account_id(rec.email)
+            if acc_id is None:
+                new_records.append(rec)
+            else:
+                existing.append((acc_id, rec))
+
+        updated = 0
+        with self.account_manager.batch():
+            added = self.account_manager.add_accounts(new_records)
+            if overwrite:
+                for acc_id, rec in existing:
+                    fields = {key: getattr(rec, key)
+                              for key in ("password", "recovery_email", "totp_secret")
+                              if getattr(rec, key)}
+                    if fields:
+                        self.account_manager.update_account(acc_id, **fields)
+                        updated += 1
+        stats["added"] += added
+        stats["updated"] += updated
+        stats["skipped"] += len(existing) - updated
+
+    @staticmethod
+    def _file_import_summary(stats: dict, result: BatchParseResult) -> str:
+        msg = f"成功导入 {stats['added']} 个"
+        if stats["updated"]:
+            msg += f"，覆盖 {stats['updated']} 个"
+        if stats["skipped"]:
+            msg += f"，跳过已存在 {stats['skipped']} 个"
+        invalid = len(result.errors) + len(result.duplicates)
+        if invalid:
+            msg += f"，无效或重复行 {invalid} 行"
+        return msg
+
+    def _ask_file_import(self, path: str, sample: BatchParseResult) -> bool | None:
+        """Preview the first lines of *path*.
+
+        Returns True to overwrite existing accounts, False to skip them, or
+        None if the user cancelled.
+        """
+        dialog = ctk.CTkToplevel()
+        dialog.title("从文件导入")
+        dialog.geometry("560x460")
+        dialog.grab_set()
+        dialog.transient()
+
+        result = [None]
+
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        ctk.CTkLabel(dialog, text=f"{os.path.basename(path)}（{size_mb:.1f} MB）",
+                     font=ctk.CTkFont(size=13, weight="bold")).pack(
+            anchor="w", padx=15, pady=(15, 5))
+        ctk.CTkLabel(dialog,
+                     text=f"前 {FILE_PREVIEW_LINES} 行预览：有效 {len(sample.records)} 行，"
+                          f"无效 {len(sample.errors)} 行，重复 {len(sample.duplicates)} 行",
+                     font=ctk.CTkFont(size=12)).pack(anchor="w", padx=15)
+
+        preview = ctk.CTkTextbox(dialog, font=ctk.CTkFont(family="Consolas", size=11),
+                                 corner_radius=6)
+        preview.pack(fill="both", expand=True, padx=15, pady=10)
+        lines = [
+            f"{rec.line:>4}  {rec.email}  |  {'*' * min(len(rec.password), 8)}  |  "
+            f"{rec.recovery_email or '-'}  |  {'TOTP' if rec.totp_secret else '-'}"
+            for rec in sample.records
+        ]
+        lines += [f"{line:>4}  ✗ {msg}" for line, msg in sample.errors]
+        preview.insert("1.0", "\n".join(lines) or "（未解析到有效行）")
+        preview.configure(state="disabled")
+
+        overwrite_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(dialog, text="覆盖已存在账号的密码 / 辅助邮箱 / TOTP（默认跳过）",
+                        variable=overwrite_var, font=ctk.CTkFont(size=12)).pack(
+            anchor="w", padx=15, pady=(0, 10))
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.pack(fill="x", padx=15, pady=(0, 15))
+
+        def start():
+            result[0] = overwrite_var.get()
+            dialog.destroy()
+
+        ctk.CTkButton(btn_frame, text="开始导入", width=100, height=34,
+                      fg_color="#2ecc71", hover_color="#27ae60",
+                      command=start).pack(side="left")
+        ctk.CTkButton(btn_frame, text="取消", width=80, height=34,
+                      fg_color=("gray70", "gray35"), hover_color=("gray60", "gray45"),
+                      command=dialog.destroy).pack(side="left", padx=(10, 0))
+
+        dialog.wait_window()
+        return result[0]
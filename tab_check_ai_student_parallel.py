@@ -353,7 +353,6 @@ class CheckAIStudentParallelTab:
         
         self.progress_var.set(f"完成! 有资格 {success}, 无资格 {failed}")
         self.on_data_changed()
-        self.selector.refresh()
         messagebox.showinfo("查询完成", f"有资格: {success}\n无资格: {failed}\n\n{summary[:500]}...")
 
     def _on_stop(self):
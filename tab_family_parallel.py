@@ -343,7 +343,6 @@ class FamilyParallelTab:
         
         self.progress_var.set(f"完成! 成功 {success}, 失败 {failed}")
         self.on_data_changed()
-        self.selector.refresh()
         messagebox.showinfo("多并发创建家庭组完成", f"成功: {success}\n失败: {failed}\n\n{summary[:500]}...")
 
     def _on_stop(self):
@@ -1,11 +1,47 @@
+import logging
+import os
+import threading
 import time
 from datetime import datetime
+from logging.handlers import RotatingFileHandler
 
 import customtkinter as ctk
 
+# Lines kept in the text widget; older ones only remain in the log file
+MAX_VISIBLE_LINES = 5000
+# Pending lines are written to the widget at most this often
+FLUSH_INTERVAL_MS = 200
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+
+def _create_file_logger() -> logging.Logger | None:
+    """Logger writing to logs/run.log, rotated by size. None if unwritable."""
+    logger = logging.getLogger("gemini_account_manager.run_log")
+    if logger.handlers:
+        return logger
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        handler = RotatingFileHandler(os.path.join(LOG_DIR, "run.log"),
+                                      maxBytes=LOG_FILE_MAX_BYTES,
+                                      backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+    except OSError:
+        return None
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
 
 class LogTab:
-    """日志 Tab：显示带时间戳和耗时的运行日志。"""
+    """日志 Tab：显示带时间戳和耗时的运行日志。
+
+    append() only queues the line; a timer writes queued lines to the
+    widget in one insert, keeps the last MAX_VISIBLE_LINES lines visible
+    and streams everything to a rotating file under logs/.
+    """
 
     def __init__(self, parent):
         parent.grid_columnconfigure(0, weight=1)
@@ -33,6 +69,11 @@ class LogTab:
 
         self._last_time: float = 0.0
         self._status_callback = None  # set by main after construction
+        # Lines not yet in the widget; append() may run off the Tk thread
+        self._pending: list[str] = []
+        self._pending_lock = threading.Lock()
+        self._file_logger = _create_file_logger()
+        self.log_textbox.after(FLUSH_INTERVAL_MS, self._flush_loop)
 
     # ── Public API ─────────────────────────────────────────────
 
@@ -44,18 +85,47 @@ class LogTab:
         self._last_time = now
 
         line = f"[{ts}]{elapsed_str} {message}\n"
+        with self._pending_lock:
+            self._pending.append(line)
+
+    def reset_timer(self):
+        self._last_time = 0.0
+
+    def flush(self):
+        """Write queued lines to the widget and the log file now."""
+        with self._pending_lock:
+            lines, self._pending = self._pending, []
+        if not lines:
+            return
+        text = "".join(lines)
+        if self._file_logger is not None:
+            self._file_logger.info(text.rstrip("\n"))
+
+        # Lines that would be trimmed right away are never inserted
+        if len(lines) > MAX_VISIBLE_LINES:
+            lines = lines[-MAX_VISIBLE_LINES:]
+            text = "".join(lines)
         self.log_textbox.configure(state="normal")
-        self.log_textbox.insert("end", line)
+        self.log_textbox.insert("end", text)
+        # Count the widget's own lines: one entry may span several. Text
+        # ends with a newline, so the line after it is empty
+        last_line = int(self.log_textbox.index("end-1c").split(".")[0])
+        excess = last_line - 1 - MAX_VISIBLE_LINES
+        if excess > 0:
+            self.log_textbox.delete("1.0", f"{excess + 1}.0")
         self.log_textbox.configure(state="disabled")
         if self._auto_scroll_var.get():
             self.log_textbox.see("end")
 
-    def reset_timer(self):
-        self._last_time = 0.0
-
     # ── Internal ────────────────────────────────────────────────
 
+    def _flush_loop(self):
+        self.flush()
+        self.log_textbox.after(FLUSH_INTERVAL_MS, self._flush_loop)
+
     def _clear_log(self):
+        # Cleared lines still go to the log file
+        self.flush()
         self.log_textbox.configure(state="normal")
         self.log_textbox.delete("1.0", "end")
         self.log_textbox.configure(state="disabled")
@@ -115,7 +115,6 @@ class ManageTab:
 
     def _on_account_saved(self, event=None):
         account_id = self.detail_panel.current_account_id
-        self.list_panel.refresh_list(self.list_panel.search_var.get())
         if account_id:
             self.list_panel.select_account_by_id(account_id)
         self.on_account_saved_external()
@@ -169,10 +168,9 @@ class ManageTab:
                 if result["success"] and result.get("cookies"):
                     if final_email:
                         # Check if it exists in DB, if not, create a skeleton or just save cookies
-                        acc = self.account_manager.get_account(final_email)
+                        acc = self.account_manager.get_account_by_email(final_email)
                         if acc:
                             self.account_manager.save_cookies(final_email, result["cookies"])
-                            self.list_panel.refresh_list(self.list_panel.search_var.get())
                             self.on_account_saved_external()
                             self.status_callback(f"✅ {final_email} Cookie 已保存")
                             messagebox.showinfo("成功", f"{final_email}\n\nCookie 已成功提取并保存！")
@@ -180,14 +178,13 @@ class ManageTab:
                             # Account not in list yet
                             # Update the form with the cookies but we can't save directly without hitting save
                             # Let's save a skeleton account and then refresh
-                            self.account_manager.add_account(
+                            new_acc = self.account_manager.add_account(
                                 email=final_email,
                                 password=password,
                                 tags=["已存 Cookie"],
                             )
                             self.account_manager.save_cookies(final_email, result["cookies"])
-                            self.list_panel.refresh_list(self.list_panel.search_var.get())
-                            self.list_panel.select_account_by_id(final_email)
+                            self.list_panel.select_account_by_id(new_acc["id"])
                             self.on_account_saved_external()
                             messagebox.showinfo("成功", f"新账号 {final_email} 已入库并保存 Cookie！")
                     else:
@@ -206,6 +203,9 @@ class ManageTab:
     def refresh(self):
         self.list_panel.refresh_list(self.list_panel.search_var.get())
 
+    def refresh_if_stale(self):
+        self.list_panel.refresh_if_stale()
+
     @property
     def totp_display(self):
         return self.detail_panel.totp_display
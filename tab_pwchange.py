@@ -7,8 +7,9 @@ import customtkinter as ctk
 from tkinter import messagebox
 
 from account_manager import AccountManager
+from batch_parser import format_errors, parse_password_updates
 from google_pw_changer import GooglePasswordChanger
-from password_generator import generate_password
+from password_generator import generate_passwords
 from ui_account_selector import AccountSelectionPanel
 
 
@@ -132,6 +133,8 @@ class PwChangeTab:
         self._pwchange_queue: queue.Queue = queue.Queue()
         self._pwchange_running = False
         self._pwchange_stop_flag = False
+        # Parsed text box of the running change, saved for the succeeded ones
+        self._pwchange_records: list = []
 
     # ── Local password operations ─────────────────────────
 
@@ -172,8 +175,7 @@ class PwChangeTab:
         self._pending_pw_changes.clear()
         self.pwchange_textbox.delete("1.0", "end")
         lines = []
-        for acc in accounts:
-            new_pw = generate_password(length=length)
+        for acc, new_pw in zip(accounts, generate_passwords(len(accounts), length=length)):
             self._pending_pw_changes[acc["id"]] = new_pw
             lines.append(AccountManager.format_line({
                 "email": acc["email"], "password": new_pw,
@@ -183,32 +185,42 @@ class PwChangeTab:
         self.pwchange_textbox.insert("1.0", "\n".join(lines))
         self.status_callback(f"已为 {len(accounts)} 个账号生成新密码（未保存）")
 
+    def _parse_updates(self, text: str) -> list | None:
+        """parse_password_updates(), or None after showing its errors."""
+        records, errors = parse_password_updates(text)
+        if errors:
+            messagebox.showerror("格式错误", "以下行无法识别，请修正后重试：" + format_errors(errors))
+            return None
+        return records
+
     def _on_apply_pwchange(self):
         text = self.pwchange_textbox.get("1.0", "end").strip()
         if not text:
             messagebox.showwarning("提示", "文本框为空，请先生成或手动输入密码")
             return
-        all_accounts = self.account_manager.get_all_accounts()
-        email_to_id = {acc["email"]: acc["id"] for acc in all_accounts}
+        records = self._parse_updates(text)
+        if records is None:
+            return
         updates = []
-        for line in text.splitlines():
-            parsed = AccountManager.parse_batch_line(line)
-            if parsed and parsed["email"] in email_to_id:
-                updates.append((email_to_id[parsed["email"]], parsed))
+        for rec in records:
+            acc_id = self.account_manager.get_account_id(rec.email)
+            if acc_id:
+                updates.append((acc_id, rec))
         if not updates:
             messagebox.showwarning("提示", "没有匹配到任何已有账号，请检查邮箱是否一致")
             return
         if not messagebox.askyesno("确认", f"确定要为 {len(updates)} 个账号更新密码吗？\n此操作不可撤销"):
             return
         count = 0
-        for acc_id, parsed in updates:
-            fields = {"password": parsed["password"]}
-            if parsed["recovery_email"]:
-                fields["recovery_email"] = parsed["recovery_email"]
-            if parsed["totp_secret"]:
-                fields["totp_secret"] = parsed["totp_secret"]
-            if self.account_manager.update_account(acc_id, **fields):
-                count += 1
+        with self.account_manager.batch():
+            for acc_id, rec in updates:
+                fields = {"password": rec.password}
+                if rec.recovery_email:
+                    fields["recovery_email"] = rec.recovery_email
+                if rec.totp_secret:
+                    fields["totp_secret"] = rec.totp_secret
+                if self.account_manager.update_account(acc_id, **fields):
+                    count += 1
         self.on_data_changed()
         self.status_callback(f"已更新 {count} 个账号的密码")
         messagebox.showinfo("完成", f"已成功更新 {count} 个账号的密码")
@@ -227,19 +239,19 @@ class PwChangeTab:
         if not text:
             messagebox.showwarning("提示", "文本框为空，请先生成或加载账号数据")
             return
-        all_accounts = self.account_manager.get_all_accounts()
-        email_to_acc = {acc["email"]: acc for acc in all_accounts}
+        records = self._parse_updates(text)
+        if records is None:
+            return
         tasks = []
-        for line in text.splitlines():
-            parsed = AccountManager.parse_batch_line(line)
-            if not parsed or parsed["email"] not in email_to_acc:
+        for rec in records:
+            existing = self.account_manager.get_account_by_email(rec.email)
+            if existing is None:
                 continue
-            existing = email_to_acc[parsed["email"]]
             tasks.append({
-                "email": parsed["email"],
+                "email": rec.email,
                 "password": existing["password"],
-                "new_password": parsed["password"],
-                "totp_secret": existing.get("totp_secret", "") or parsed.get("totp_secret", ""),
+                "new_password": rec.password,
+                "totp_secret": existing.get("totp_secret", "") or rec.totp_secret,
             })
         if not tasks:
             messagebox.showwarning("提示", "没有匹配到任何已有账号")
@@ -264,6 +276,7 @@ class PwChangeTab:
             return
         self._pwchange_running = True
         self._pwchange_stop_flag = False
+        self._pwchange_records = records
         self.real_pwchange_btn.configure(state="disabled")
         self.stop_pwchange_btn.configure(state="normal")
         self.pwchange_progress_var.set(f"准备中... 共 {len(tasks)} 个账号")
@@ -306,10 +319,9 @@ class PwChangeTab:
                     self.log_callback(f"[改密 {idx+1}/{total}] {status}")
                 elif kind == "update_local":
                     _, email, new_pw = msg
-                    for acc in self.account_manager.get_all_accounts():
-                        if acc["email"] == email:
-                            self.account_manager.update_account(acc["id"], password=new_pw)
-                            break
+                    acc_id = self.account_manager.get_account_id(email)
+                    if acc_id:
+                        self.account_manager.update_account(acc_id, password=new_pw)
                 elif kind == "done":
                     self._on_pwchange_finished(msg[1])
                     return
@@ -326,28 +338,23 @@ class PwChangeTab:
         failed = len(results) - success
         self.log_callback(f"━━━ 批量改密完成：成功 {success}, 失败 {failed} ━━━")
         saved = 0
-        text = self.pwchange_textbox.get("1.0", "end").strip()
-        if text:
-            all_accounts = self.account_manager.get_all_accounts()
-            email_to_id = {acc["email"]: acc["id"] for acc in all_accounts}
-            success_emails = {r["email"] for r in results if r["success"]}
-            for line in text.splitlines():
-                parsed = AccountManager.parse_batch_line(line)
-                if parsed and parsed["email"] in email_to_id and parsed["email"] in success_emails:
-                    fields = {"password": parsed["password"]}
-                    if parsed["recovery_email"]:
-                        fields["recovery_email"] = parsed["recovery_email"]
-                    if parsed["totp_secret"]:
-                        fields["totp_secret"] = parsed["totp_secret"]
-                    if self.account_manager.update_account(email_to_id[parsed["email"]], **fields):
-                        saved += 1
+        success_emails = {r["email"] for r in results if r["success"]}
+        for rec in self._pwchange_records:
+            acc_id = self.account_manager.get_account_id(rec.email)
+            if acc_id and rec.email in success_emails:
+                fields = {"password": rec.password}
+                if rec.recovery_email:
+                    fields["recovery_email"] = rec.recovery_email
+                if rec.totp_secret:
+                    fields["totp_secret"] = rec.totp_secret
+                if self.account_manager.update_account(acc_id, **fields):
+                    saved += 1
         summary = "\n".join(
             f"{r['email']} → {'OK' if r['success'] else 'FAIL: ' + r['message']}"
             for r in results
         )
         self.pwchange_progress_var.set(f"完成! 成功 {success} 个, 失败 {failed} 个, 已保存 {saved} 个")
         self.on_data_changed()
-        self.selector.refresh()
         self.status_callback(f"在线改密完成: 成功 {success}, 失败 {failed}, 已保存 {saved}")
         messagebox.showinfo("改密完成",
             f"成功: {success} 个\n失败: {failed} 个\n已自动保存: {saved} 个\n\n{summary}")
@@ -7,8 +7,9 @@ import customtkinter as ctk
 from tkinter import messagebox
 
 from account_manager import AccountManager
+from batch_parser import format_errors, parse_password_updates
 from google_pw_changer import GooglePasswordChanger
-from password_generator import generate_password
+from password_generator import generate_passwords
 from ui_account_selector import AccountSelectionPanel
 
 
@@ -205,8 +206,7 @@ class PwChangeParallelTab:
         length = self.pw_len_var.get()
         self.textbox.delete("1.0", "end")
         lines = []
-        for acc in accounts:
-            new_pw = generate_password(length=length)
+        for acc, new_pw in zip(accounts, generate_passwords(len(accounts), length=length)):
             lines.append(AccountManager.format_line({
                 "email": acc["email"], "password": new_pw,
                 "recovery_email": acc.get("recovery_email", ""),
@@ -215,32 +215,42 @@ class PwChangeParallelTab:
         self.textbox.insert("1.0", "\n".join(lines))
         self.status_callback(f"已为 {len(accounts)} 个账号生成新密码（未保存）")
 
+    def _parse_updates(self, text: str) -> list | None:
+        """parse_password_updates(), or None after showing its errors."""
+        records, errors = parse_password_updates(text)
+        if errors:
+            messagebox.showerror("格式错误", "以下行无法识别，请修正后重试：" + format_errors(errors))
+            return None
+        return records
+
     def _on_apply_pwchange(self):
         text = self.textbox.get("1.0", "end").strip()
         if not text:
             messagebox.showwarning("提示", "文本框为空，请先生成或手动输入密码")
             return
-        all_accounts = self.account_manager.get_all_accounts()
-        email_to_id = {acc["email"]: acc["id"] for acc in all_accounts}
+        records = self._parse_updates(text)
+        if records is None:
+            return
         updates = []
-        for line in text.splitlines():
-            parsed = AccountManager.parse_batch_line(line)
-            if parsed and parsed["email"] in email_to_id:
-                updates.append((email_to_id[parsed["email"]], parsed))
+        for rec in records:
+            acc_id = self.account_manager.get_account_id(rec.email)
+            if acc_id:
+                updates.append((acc_id, rec))
         if not updates:
             messagebox.showwarning("提示", "没有匹配到任何已有账号，请检查邮箱是否一致")
             return
         if not messagebox.askyesno("确认", f"确定要为 {len(updates)} 个账号在本地保存新密码吗？\n注意：这仅保存在本地表格中，还需执行并发改密才会真正修改 Google 密码！"):
             return
         count = 0
-        for acc_id, parsed in updates:
-            fields = {"password": parsed["password"]}
-            if parsed["recovery_email"]:
-                fields["recovery_email"] = parsed["recovery_email"]
-            if parsed["totp_secret"]:
-                fields["totp_secret"] = parsed["totp_secret"]
-            if self.account_manager.update_account(acc_id, **fields):
-                count += 1
+        with self.account_manager.batch():
+            for acc_id, rec in updates:
+                fields = {"password": rec.password}
+                if rec.recovery_email:
+                    fields["recovery_email"] = rec.recovery_email
+                if rec.totp_secret:
+                    fields["totp_secret"] = rec.totp_secret
+                if self.account_manager.update_account(acc_id, **fields):
+                    count += 1
         self.on_data_changed()
         self.status_callback(f"已在本地更新 {count} 个账号的密码")
         messagebox.showinfo("完成", f"已在本地更新 {count} 个账号的密码，可现在点击执行并发改密。")
@@ -256,29 +266,24 @@ class PwChangeParallelTab:
 
         # Parse text box to get target (email -> new_password)
         # We assume the text box contains lines with the NEW password.
-        target_updates = {}
-        for line in text.splitlines():
-            if line.strip().startswith("#"): continue
-            parsed = AccountManager.parse_batch_line(line)
-            if parsed:
-                target_updates[parsed["email"]] = parsed
+        records = self._parse_updates(text)
+        if records is None:
+            return
+        target_updates = {rec.email: rec for rec in records}
 
         if not target_updates:
             messagebox.showwarning("提示", "未找到有效的账号行")
             return
 
         # Match with existing accounts (to get OLD password and TOTP)
-        all_accounts = self.account_manager.get_all_accounts()
-        email_to_acc = {acc["email"]: acc for acc in all_accounts}
-
         tasks = []
         for email, new_data in target_updates.items():
-            if email not in email_to_acc:
+            existing = self.account_manager.get_account_by_email(email)
+            if existing is None:
                 continue
-            existing = email_to_acc[email]
             
             # Check if new password is different
-            if existing["password"] == new_data["password"]:
+            if existing["password"] == new_data.password:
                 # If they are same, maybe user didn't update text box? 
                 # We warn but allow if user insists? 
                 pass 
@@ -286,8 +291,8 @@ class PwChangeParallelTab:
             tasks.append({
                 "email": email,
                 "password": existing["password"], # Old password for login
-                "new_password": new_data["password"], # New password to set
-                "totp_secret": existing.get("totp_secret", "") or new_data.get("totp_secret", ""),
+                "new_password": new_data.password, # New password to set
+                "totp_secret": existing.get("totp_secret", "") or new_data.totp_secret,
                 "cookies": existing.get("cookies"),
             })
 
@@ -454,10 +459,9 @@ class PwChangeParallelTab:
 
                 elif kind == "update_local":
                     _, email, new_password = msg
-                    for acc in self.account_manager.get_all_accounts():
-                        if acc["email"] == email:
-                            self.account_manager.update_account(acc["id"], password=new_password)
-                            break
+                    acc_id = self.account_manager.get_account_id(email)
+                    if acc_id:
+                        self.account_manager.update_account(acc_id, password=new_password)
 
                 elif kind == "save_cookies":
                     _, email, cookies = msg
@@ -489,7 +493,6 @@ class PwChangeParallelTab:
         
         self.progress_var.set(f"完成! 成功 {success}, 失败 {failed}")
         self.on_data_changed()
-        self.selector.refresh()
         messagebox.showinfo("多并发改密完成", f"成功: {success}\n失败: {failed}\n\n{summary}")
 
     def _on_stop(self):
@@ -318,10 +318,9 @@ class TotpParallelTab:
 
                 elif kind == "update_local":
                     _, email, new_secret = msg
-                    for acc in self.account_manager.get_all_accounts():
-                        if acc["email"] == email:
-                            self.account_manager.update_account(acc["id"], totp_secret=new_secret)
-                            break
+                    acc_id = self.account_manager.get_account_id(email)
+                    if acc_id:
+                        self.account_manager.update_account(acc_id, totp_secret=new_secret)
 
                 elif kind == "save_cookies":
                     _, email, cookies = msg
@@ -347,12 +346,10 @@ class TotpParallelTab:
         self.log_callback(f"━━━ 多并发改2FA完成：成功 {success}, 失败 {failed} ━━━")
 
         self.textbox.delete("1.0", "end")
-        all_accs = self.account_manager.get_all_accounts()
-        email_to_acc = {acc["email"]: acc for acc in all_accs}
         lines = []
         for r in results:
             if r["success"] and r.get("new_totp_secret"):
-                acc = email_to_acc.get(r["email"])
+                acc = self.account_manager.get_account_by_email(r["email"])
                 if acc:
                      lines.append(AccountManager.format_line(acc))
         
@@ -366,7 +363,6 @@ class TotpParallelTab:
         
         self.progress_var.set(f"完成! 成功 {success}, 失败 {failed}")
         self.on_data_changed()
-        self.selector.refresh()
         messagebox.showinfo("多并发改2FA完成", f"成功: {success}\n失败: {failed}\n\n{summary}")
 
     def _on_stop(self):
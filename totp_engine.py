@@ -1,38 +1,169 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import threading
 import time
 import re
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
 
 import pyotp
 
+PERIOD = 30
+DIGITS = 6
+# Distinct secrets whose decoded key and current code are kept
+CACHE_SIZE = 4096
+
+
+# Unpadded base32 text is decodable only at these lengths mod 8
+_VALID_LENGTHS_MOD8 = frozenset((0, 2, 4, 5, 7))
+_BASE32_RE = re.compile(r"[A-Z2-7]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class SecretReport(NamedTuple):
+    checked: int                        # accounts with a non-empty secret
+    normalized: dict[str, str]          # id -> canonical secret, where it differs
+    bad_padding: list[str]              # ids whose "=" padding was wrong (fixed in normalized)
+    invalid: list[str]                  # ids whose secret is not base32
+    duplicates: dict[str, list[str]]    # canonical secret -> ids sharing it
+
+
+class _CacheEntry:
+    __slots__ = ("key", "window", "code")
+
+    def __init__(self, key: bytes | None):
+        self.key = key          # decoded secret; None if it is not valid base32
+        self.window = -1        # time window `code` belongs to
+        self.code = ""
+
+
+# secret as given -> entry, least recently used first. Shared by the UI
+# and the browser worker threads, hence the lock.
+_cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _decode_secret(secret: str) -> bytes | None:
+    cleaned = "".join(secret.split()).upper()
+    # Same padding rule as pyotp.OTP.byte_secret
+    missing = len(cleaned) % 8
+    if missing:
+        cleaned += "=" * (8 - missing)
+    try:
+        key = base64.b32decode(cleaned)
+    except (binascii.Error, ValueError):
+        return None
+    return key or None
+
+
+def _hotp(key: bytes, counter: int) -> str:
+    """RFC 4226 HOTP with SHA-1, as pyotp computes it."""
+    digest = hmac.new(key, struct.pack(">Q", counter), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    value = struct.unpack_from(">I", digest, offset)[0] & 0x7FFFFFFF
+    return str(value % 10 ** DIGITS).zfill(DIGITS)
+
+
+def _entry(secret: str) -> _CacheEntry:
+    """Return the cache entry for *secret*; caller holds _cache_lock."""
+    entry = _cache.get(secret)
+    if entry is not None:
+        _cache.move_to_end(secret)
+        return entry
+    entry = _CacheEntry(_decode_secret(secret))
+    _cache[secret] = entry
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return entry
+
+
+def _code(entry: _CacheEntry, window: int) -> str:
+    if entry.key is None:
+        return ""
+    if entry.window != window:
+        entry.code = _hotp(entry.key, window)
+        entry.window = window
+    return entry.code
+
 
 class TOTPEngine:
     @staticmethod
-    def generate_code(secret: str) -> str:
-        """Return current 6-digit TOTP code for the given base32 secret."""
+    def generate_code(secret: str, for_time: float | None = None) -> str:
+        """Return the 6-digit TOTP code for the given base32 secret.
+
+        The decoded key is cached and the code is computed once per
+        30-second window, so calling this every second is cheap.
+        """
         if not secret:
             return ""
-        try:
-            cleaned = re.sub(r"\s+", "", secret).upper()
-            totp = pyotp.TOTP(cleaned)
-            return totp.now()
-        except Exception:
-            return ""
+        window = int(time.time() if for_time is None else for_time) // PERIOD
+        with _cache_lock:
+            return _code(_entry(secret), window)
+
+    @staticmethod
+    def generate_codes(secrets: Iterable[str], for_time: float | None = None) -> dict[str, str]:
+        """Return {secret: code} for many secrets at once ("" if invalid)."""
+        window = int(time.time() if for_time is None else for_time) // PERIOD
+        codes = {}
+        with _cache_lock:
+            for secret in secrets:
+                if secret and secret not in codes:
+                    codes[secret] = _code(_entry(secret), window)
+        return codes
 
     @staticmethod
     def get_remaining_seconds() -> int:
         """Return seconds remaining in current 30-second TOTP window."""
-        return 30 - (int(time.time()) % 30)
+        return PERIOD - (int(time.time()) % PERIOD)
 
     @staticmethod
     def validate_secret(secret: str) -> bool:
         """Check if a string is a valid base32 TOTP secret."""
         if not secret:
             return False
-        try:
-            cleaned = re.sub(r"\s+", "", secret).upper()
-            pyotp.TOTP(cleaned).now()
-            return True
-        except Exception:
-            return False
+        with _cache_lock:
+            return _entry(secret).key is not None
+
+    @staticmethod
+    def check_secrets(items: Iterable[tuple[str, str]]) -> SecretReport:
+        """Validate many (account_id, secret) pairs in one pass.
+
+        The canonical form is upper case without whitespace or "=" padding
+        (what generate_secret() produces). Padding is recomputed from the
+        length, so a secret is only flagged as badly padded when its "="
+        count would make decoding fail and stripping it fixes that.
+        Validity is checked against the base32 alphabet and length rules
+        directly instead of decoding every secret.
+        """
+        normalized, bad_padding, invalid = {}, [], []
+        by_secret: dict[str, list[str]] = {}
+        fullmatch = _BASE32_RE.fullmatch
+        valid_lengths = _VALID_LENGTHS_MOD8
+        checked = 0
+        for acc_id, secret in items:
+            if not secret:
+                continue
+            checked += 1
+            cleaned = secret.upper()
+            if not cleaned.isalnum():
+                cleaned = _WHITESPACE_RE.sub("", cleaned)
+            canonical = cleaned.rstrip("=")
+            if (not fullmatch(canonical)
+                    or len(canonical) % 8 not in valid_lengths):
+                invalid.append(acc_id)
+                continue
+            if len(canonical) != len(cleaned):
+                padding = len(cleaned) - len(canonical)
+                if padding != (-len(canonical)) % 8:
+                    bad_padding.append(acc_id)
+            if canonical != secret:
+                normalized[acc_id] = canonical
+            by_secret.setdefault(canonical, []).append(acc_id)
+        duplicates = {sec: ids for sec, ids in by_secret.items() if len(ids) > 1}
+        return SecretReport(checked, normalized, bad_padding, invalid, duplicates)
 
     @staticmethod
     def clean_secret(secret: str) -> str:
@@ -268,6 +268,19 @@ class AccountDetailPanel(ctk.CTkScrollableFrame):
         if totp_secret:
             totp_secret = TOTPEngine.clean_secret(totp_secret)
 
+        # Only prompt for a new or changed password, not when editing other
+        # fields of an account that already shares its password
+        stored = None
+        if self.current_account_id:
+            view = self.account_manager.get_account_view(self.current_account_id)
+            stored = view.get("password", "") if view is not None else None
+        reused = set()
+        if password != stored:
+            reused = self.account_manager.password_users(password, exclude_id=self.current_account_id)
+        if reused and not messagebox.askyesno(
+                "密码重复", f"该密码已被其他 {len(reused)} 个账号使用，仍要保存吗？"):
+            return
+
         if self.current_account_id:
             self.account_manager.update_account(
                 self.current_account_id,
@@ -2,7 +2,82 @@ import customtkinter as ctk
 import tkinter
 from tkinter import messagebox
 
-from account_manager import AccountManager, TAG_OPTIONS
+from account_manager import (AccountManager, TAG_OPTIONS, CHANGE_UPDATED, CHANGE_TAGS,
+                             SORT_CREATED, SORT_UPDATED, SORT_LABELS, SORT_OPTIONS)
+from ui_virtual_list import VirtualList
+
+TAG_EMOJI = {"家庭组": "🏠", "成品号": "✅", "资格号": "⭐"}
+TAG_COLORS = {"家庭组": "#2980b9", "成品号": "#27ae60", "资格号": "#8e44ad"}
+ROW_HEIGHT = 38
+# Wait this long after the last keystroke before filtering
+SEARCH_DEBOUNCE_MS = 200
+
+
+class _AccountRow(ctk.CTkFrame):
+    """Pooled list row: email button, tag toggles and cookie badge.
+
+    The same widget is rebound to different accounts while scrolling;
+    ``index`` is the position it currently shows.
+    """
+
+    def __init__(self, parent, panel: "AccountListPanel"):
+        super().__init__(parent, fg_color="transparent", height=36)
+        self.pack_propagate(False)
+        self.index = -1
+
+        # Email button (takes remaining space)
+        self.email_btn = ctk.CTkButton(
+            self, text="", anchor="w",
+            font=ctk.CTkFont(size=12), height=34, corner_radius=6,
+            fg_color="transparent", text_color=("gray10", "gray90"),
+            hover_color=("gray85", "gray30"),
+        )
+        self.email_btn.bind("<Button-1>", lambda e: panel._on_click(e, self.index))
+        self.email_btn.bind("<Button-3>", lambda e: panel._show_menu(e, self.index))
+        self.email_btn.pack(side="left", fill="x", expand=True)
+
+        # Tag toggle buttons
+        self.tag_btns = {}
+        for tag_name in TAG_OPTIONS:
+            tag_btn = ctk.CTkButton(
+                self, text=TAG_EMOJI[tag_name], width=28, height=28,
+                font=ctk.CTkFont(size=12), corner_radius=4,
+                fg_color=("gray80", "gray25"), hover_color=TAG_COLORS[tag_name],
+                command=lambda _tag=tag_name: panel._toggle_tag(
+                    panel._account_ids[self.index], _tag),
+            )
+            tag_btn.pack(side="left", padx=1)
+            self.tag_btns[tag_name] = tag_btn
+
+        # Cookie indicator, packed only for accounts with cookies
+        self.cookie_badge = ctk.CTkButton(
+            self, text="🍪", width=28, height=28,
+            font=ctk.CTkFont(size=12), corner_radius=4,
+            fg_color="#e67e22", hover_color="#d35400",
+            state="disabled",
+        )
+        self._has_cookie_badge = False
+
+    def show(self, acc, selected: bool):
+        email = acc["email"]
+        display = email if len(email) <= 24 else email[:21] + "..."
+        if selected:
+            self.email_btn.configure(text=display, fg_color=("#1a73e8", "#1a73e8"), text_color="white")
+        else:
+            self.email_btn.configure(text=display, fg_color="transparent", text_color=("gray10", "gray90"))
+
+        acc_tags = acc.get("tags", [])
+        for tag_name, tag_btn in self.tag_btns.items():
+            is_active = tag_name in acc_tags
+            tag_btn.configure(fg_color=TAG_COLORS[tag_name] if is_active else ("gray80", "gray25"))
+
+        has_cookies = bool(acc.get("cookies"))
+        if has_cookies != self._has_cookie_badge:
+            if has_cookies:
+                self.cookie_badge.pack(side="left", padx=1)
+            else:
+                self.cookie_badge.pack_forget()
+            self._has_cookie_badge = has_cookies
 
 
 class AccountListPanel(ctk.CTkFrame):
@@ -12,7 +87,7 @@ class AccountListPanel(ctk.CTkFrame):
         self.on_select_callback = on_select_callback
         self.on_new_callback = on_new_callback
         self._account_ids: list[str] = []
-        self._sort_by = "created"  # "email" or "created"
+        self._sort_by = SORT_CREATED  # one of SORT_OPTIONS
 
         # Header + sort toggle
         header_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -20,7 +95,7 @@ class AccountListPanel(ctk.CTkFrame):
         ctk.CTkLabel(header_frame, text="账号列表", font=ctk.CTkFont(size=15, weight="bold")
                      ).pack(side="left")
         self._sort_btn = ctk.CTkButton(
-            header_frame, text="导入序", width=60, height=26,
+            header_frame, text=SORT_LABELS[SORT_CREATED], width=60, height=26,
             font=ctk.CTkFont(size=11), corner_radius=6,
             fg_color=("gray75", "gray30"), hover_color=("gray65", "gray40"),
             command=self._toggle_sort,
@@ -29,6 +104,7 @@ class AccountListPanel(ctk.CTkFrame):
 
         # Search
         self.search_var = ctk.StringVar()
+        self._search_after_id = None
         self.search_var.trace_add("write", self._on_search_changed)
         search_entry = ctk.CTkEntry(self, textvariable=self.search_var,
                                      placeholder_text="搜索账号...", height=32)
@@ -47,13 +123,17 @@ class AccountListPanel(ctk.CTkFrame):
         )
         self._tag_filter.pack(side="left", padx=(5, 0))
 
-        # Scrollable list
-        self.scroll_frame = ctk.CTkScrollableFrame(self, corner_radius=8)
-        self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=(0, 8))
+        # Virtualized list: only the rows on screen exist as widgets
+        self._list = VirtualList(
+            self, row_height=ROW_HEIGHT, corner_radius=8,
+            create_row=lambda parent: _AccountRow(parent, self),
+            bind_row=self._bind_row,
+        )
+        self._list.pack(fill="both", expand=True, padx=10, pady=(0, 8))
 
-        self._item_buttons: list[ctk.CTkFrame] = []
         self._selected_indices: set[int] = set()
         self._last_clicked_idx: int = -1
+        self._stale = False
 
         # Buttons
         btn_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -73,98 +153,28 @@ class AccountListPanel(ctk.CTkFrame):
                       command=lambda: self.refresh_list(self.search_var.get())).pack(side="right")
 
         self.refresh_list()
+        account_manager.subscribe(self._on_accounts_changed)
 
     def _toggle_sort(self):
-        if self._sort_by == "created":
-            self._sort_by = "email"
-            self._sort_btn.configure(text="A→Z")
-        else:
-            self._sort_by = "created"
-            self._sort_btn.configure(text="导入序")
+        next_index = (SORT_OPTIONS.index(self._sort_by) + 1) % len(SORT_OPTIONS)
+        self._sort_by = SORT_OPTIONS[next_index]
+        self._sort_btn.configure(text=SORT_LABELS[self._sort_by])
         self.refresh_list(self.search_var.get())
 
     def refresh_list(self, filter_text: str = ""):
-        prev_selected_ids = self.get_selected_account_ids() if hasattr(self, '_selected_indices') else []
-        for btn in self._item_buttons:
-            btn.destroy()
-        self._item_buttons.clear()
-        self._account_ids.clear()
+        prev_selected_ids = set(self.get_selected_account_ids()) if hasattr(self, '_selected_indices') else set()
         self._selected_indices = set()
         self._last_clicked_idx = -1
+        self._stale = False
 
-        if filter_text:
-            accounts = self.account_manager.search_accounts(filter_text, sort_by=self._sort_by)
-        else:
-            accounts = self.account_manager.get_all_accounts(sort_by=self._sort_by)
-
-        tag_map = {"家庭组": "🏠", "成品号": "✅", "资格号": "⭐"}
-        tag_colors = {"家庭组": "#2980b9", "成品号": "#27ae60", "资格号": "#8e44ad"}
-
-        for i, acc in enumerate(accounts):
-            # Apply tag filter
-            tag_filter = self._tag_filter_var.get()
-            if tag_filter != "全部":
-                if tag_filter not in acc.get("tags", []):
-                    continue
-
-            email = acc["email"]
-            acc_tags = acc.get("tags", [])
-            acc_id = acc["id"]
-
-            # Row frame
-            row = ctk.CTkFrame(self.scroll_frame, fg_color="transparent", height=36)
-            row.pack(fill="x", pady=1)
-            row.pack_propagate(False)
-
-            list_idx = len(self._item_buttons)
-
-            # Email button (takes remaining space)
-            display = email if len(email) <= 24 else email[:21] + "..."
-            email_btn = ctk.CTkButton(
-                row, text=display, anchor="w",
-                font=ctk.CTkFont(size=12), height=34, corner_radius=6,
-                fg_color="transparent", text_color=("gray10", "gray90"),
-                hover_color=("gray85", "gray30"),
-            )
-            email_btn.bind("<Button-1>", lambda e, idx=list_idx: self._on_click(e, idx))
-            email_btn.pack(side="left", fill="x", expand=True)
-
-            # Context Menu on email button
-            def show_menu(event, _acc=acc):
-                menu = tkinter.Menu(self, tearoff=0)
-                menu.add_command(label="复制邮箱", command=lambda: self._copy_to_clip(_acc["email"]))
-                menu.add_command(label="复制密码", command=lambda: self._copy_to_clip(_acc["password"]))
-                menu.add_command(label="复制TOTP密钥", command=lambda: self._copy_to_clip(_acc.get("totp_secret", "")))
-                full_line = AccountManager.format_line(_acc)
-                menu.add_command(label="复制完整行", command=lambda: self._copy_to_clip(full_line))
-                menu.post(event.x_root, event.y_root)
-
-            email_btn.bind("<Button-3>", show_menu)
-
-            # Tag toggle buttons
-            for tag_name in TAG_OPTIONS:
-                emoji = tag_map[tag_name]
-                is_active = tag_name in acc_tags
-                tag_btn = ctk.CTkButton(
-                    row, text=emoji, width=28, height=28,
-                    font=ctk.CTkFont(size=12), corner_radius=4,
-                    fg_color=tag_colors[tag_name] if is_active else ("gray80", "gray25"),
-                    hover_color=tag_colors[tag_name],
-                    command=lambda _id=acc_id, _tag=tag_name: self._toggle_tag(_id, _tag),
-                )
-                tag_btn.pack(side="left", padx=1)
-
-            self._item_buttons.append(row)  # store row frame for cleanup
-            self._account_ids.append(acc_id)
-
-            # Cookie indicator
-            if acc.get("cookies"):
-                ctk.CTkButton(
-                    row, text="🍪", width=28, height=28,
-                    font=ctk.CTkFont(size=12), corner_radius=4,
-                    fg_color="#e67e22", hover_color="#d35400",
-                    state="disabled",
-                ).pack(side="left", padx=1)
+        ids = self.account_manager.search_account_ids(filter_text, sort_by=self._sort_by)
+
+        # Apply tag filter
+        tag_filter = self._tag_filter_var.get()
+        if tag_filter != "全部":
+            tagged = self.account_manager.query_tags(all_of=[tag_filter])
+            ids = [acc_id for acc_id in ids if acc_id in tagged]
+        self._account_ids = ids
 
         # Restore multi-selection logic
         for idx, aid in enumerate(self._account_ids):
@@ -172,7 +182,55 @@ class AccountListPanel(ctk.CTkFrame):
                 self._selected_indices.add(idx)
                 self._last_clicked_idx = idx
 
-        self._update_highlighting()
+        self._list.set_count(len(self._account_ids))
+
+    def _bind_row(self, row: _AccountRow, index: int):
+        acc = self.account_manager.get_account_view(self._account_ids[index])
+        if acc is None:
+            return
+        row.index = index
+        row.show(acc, index in self._selected_indices)
+
+    def _show_menu(self, event, index: int):
+        acc = self.account_manager.get_account_view(self._account_ids[index])
+        if acc is None:
+            return
+        menu = tkinter.Menu(self, tearoff=0)
+        menu.add_command(label="复制邮箱", command=lambda: self._copy_to_clip(acc["email"]))
+        menu.add_command(label="复制密码", command=lambda: self._copy_to_clip(acc["password"]))
+        menu.add_command(label="复制TOTP密钥", command=lambda: self._copy_to_clip(acc.get("totp_secret", "")))
+        full_line = AccountManager.format_line(acc)
+        menu.add_command(label="复制完整行", command=lambda: self._copy_to_clip(full_line))
+        menu.post(event.x_root, event.y_root)
+
+    # ── Change notifications ──────────────────────────────
+
+    def _on_accounts_changed(self, change):
+        if not self.winfo_viewable():
+            # Hidden tab: catch up when it is shown again
+            self._stale = True
+            return
+        if self._can_update_in_place(change):
+            # Only the rows on screen exist; rebinding them is enough
+            self._list.redraw()
+        else:
+            self.refresh_list(self.search_var.get())
+
+    def _can_update_in_place(self, change) -> bool:
+        """True when the change cannot add, remove or reorder visible rows."""
+        if change.kind == CHANGE_TAGS:
+            # Tags are matched by the search box as well as the tag filter,
+            # and a tag edit bumps updated_at
+            return (self._sort_by != SORT_UPDATED and self._tag_filter_var.get() == "全部"
+                    and not self.search_var.get())
+        if change.kind == CHANGE_UPDATED:
+            # An edit can move a row under A→Z, 更新序 or a search filter
+            return self._sort_by == SORT_CREATED and not self.search_var.get()
+        return False
+
+    def refresh_if_stale(self):
+        if self._stale:
+            self.refresh_list(self.search_var.get())
 
     def _toggle_tag(self, account_id: str, tag_name: str):
         """Toggle a tag on an account and refresh the list."""
@@ -184,9 +242,8 @@ class AccountListPanel(ctk.CTkFrame):
             tags.remove(tag_name)
         else:
             tags.append(tag_name)
+        # The change notification updates (or, when filtered, rebuilds) the row
         self.account_manager.update_account(account_id, tags=tags)
-        # Refresh but keep current filter/search, which natively preserves multi-select state
-        self.refresh_list(self.search_var.get())
 
     def _copy_to_clip(self, text):
         if text:
@@ -205,20 +262,18 @@ class AccountListPanel(ctk.CTkFrame):
             idx = self._account_ids.index(account_id)
             self._selected_indices = {idx}
             self._last_clicked_idx = idx
-            self._update_highlighting()
+            self._list.scroll_to_index(idx)
 
     def _update_highlighting(self):
-        for i, row in enumerate(self._item_buttons):
-            children = row.winfo_children()
-            if not children:
-                continue
-            btn = children[0]
-            if i in self._selected_indices:
-                btn.configure(fg_color=("#1a73e8", "#1a73e8"), text_color="white")
-            else:
-                btn.configure(fg_color="transparent", text_color=("gray10", "gray90"))
+        self._list.redraw()
 
     def _on_search_changed(self, *args):
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(SEARCH_DEBOUNCE_MS, self._apply_search)
+
+    def _apply_search(self):
+        self._search_after_id = None
         self.refresh_list(self.search_var.get())
 
     def _on_click(self, event, idx: int):
@@ -273,14 +328,17 @@ class AccountListPanel(ctk.CTkFrame):
             msg = f"确定要删除选中的 {len(account_ids)} 个账号吗？\n此操作不可撤销！"
             
         if messagebox.askyesno("确认删除", msg):
-            for aid in account_ids:
-                self.account_manager.delete_account(aid)
-            self.refresh_list(self.search_var.get())
+            with self.account_manager.batch():
+                for aid in account_ids:
+                    self.account_manager.delete_account(aid)
             self.on_new_callback()
 
     def _on_batch_delete(self):
-        accounts = self.account_manager.get_all_accounts(sort_by=self._sort_by)
-        if not accounts:
+        # Rows bind from the ids at open time; background jobs may still add
+        # or delete accounts while the dialog is up
+        ids = self.account_manager.account_ids(self._sort_by)
+        total = len(ids)
+        if not total:
             messagebox.showwarning("提示", "没有可删除的账号")
             return
 
@@ -299,15 +357,17 @@ class AccountListPanel(ctk.CTkFrame):
         sel_frame = ctk.CTkFrame(dialog, fg_color="transparent")
         sel_frame.pack(fill="x", padx=15, pady=(0, 5))
 
-        check_vars: list[tuple[str, str, ctk.BooleanVar]] = []
+        selected: set[str] = set()
 
         def select_all():
-            for _, _, var in check_vars:
-                var.set(True)
+            selected.update(ids)
+            check_list.redraw()
+            update_count()
 
         def select_none():
-            for _, _, var in check_vars:
-                var.set(False)
+            selected.clear()
+            check_list.redraw()
+            update_count()
 
         ctk.CTkButton(sel_frame, text="全选", width=55, height=26,
                       font=ctk.CTkFont(size=11),
@@ -318,45 +378,67 @@ class AccountListPanel(ctk.CTkFrame):
                       fg_color=("gray75", "gray30"), hover_color=("gray65", "gray40"),
                       command=select_none).pack(side="left")
 
-        count_var = ctk.StringVar(value=f"已选: 0/{len(accounts)}")
+        count_var = ctk.StringVar(value=f"已选: 0/{total}")
         ctk.CTkLabel(sel_frame, textvariable=count_var,
                      font=ctk.CTkFont(size=11)).pack(side="right")
 
-        def update_count(*_):
-            n = sum(1 for _, _, v in check_vars if v.get())
-            count_var.set(f"已选: {n}/{len(accounts)}")
+        def update_count():
+            count_var.set(f"已选: {len(selected)}/{total}")
 
-        # Scrollable checkbox list
-        scroll = ctk.CTkScrollableFrame(dialog, corner_radius=6)
-        scroll.pack(fill="both", expand=True, padx=15, pady=(0, 10))
+        def on_toggled(cb):
+            if cb.get():
+                selected.add(cb.account_id)
+            else:
+                selected.discard(cb.account_id)
+            update_count()
+
+        def create_row(parent):
+            cb = ctk.CTkCheckBox(parent, text="", font=ctk.CTkFont(size=12),
+                                 height=30, corner_radius=4)
+            cb.configure(command=lambda: on_toggled(cb))
+            cb.account_id = None
+            return cb
+
+        def bind_row(cb, index: int):
+            acc_id = ids[index]
+            acc = self.account_manager.get_account_view(acc_id)
+            cb.account_id = acc_id
+            if acc is None:
+                cb.configure(text="（已删除）", state="disabled")
+            else:
+                email = acc["email"]
+                cb.configure(text=email if len(email) <= 40 else email[:37] + "...",
+                             state="normal")
+            if acc_id in selected:
+                cb.select()
+            else:
+                cb.deselect()
 
-        for acc in accounts:
-            var = ctk.BooleanVar(value=False)
-            var.trace_add("write", update_count)
-            email = acc["email"]
-            display = email if len(email) <= 40 else email[:37] + "..."
-            ctk.CTkCheckBox(scroll, text=display, variable=var,
-                            font=ctk.CTkFont(size=12), height=30,
-                            corner_radius=4).pack(fill="x", pady=1)
-            check_vars.append((acc["id"], acc["email"], var))
+        # Virtualized checkbox list
+        check_list = VirtualList(dialog, row_height=32, corner_radius=6,
+                                 create_row=create_row, bind_row=bind_row)
+        check_list.pack(fill="both", expand=True, padx=15, pady=(0, 10))
+        check_list.set_count(total)
 
         # Confirm / Cancel buttons
         btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
         btn_frame.pack(fill="x", padx=15, pady=(0, 15))
 
         def do_delete():
-            selected = [(aid, email) for aid, email, var in check_vars if var.get()]
-            if not selected:
+            # Accounts deleted elsewhere since the dialog opened are skipped
+            targets = [aid for aid in selected
+                       if self.account_manager.get_account_view(aid) is not None]
+            if not targets:
                 messagebox.showwarning("提示", "请先勾选要删除的账号", parent=dialog)
                 return
             if not messagebox.askyesno("确认批量删除",
-                    f"确定要删除选中的 {len(selected)} 个账号吗？\n此操作不可撤销！",
+                    f"确定要删除选中的 {len(targets)} 个账号吗？\n此操作不可撤销！",
                     parent=dialog):
                 return
-            for aid, _ in selected:
-                self.account_manager.delete_account(aid)
+            with self.account_manager.batch():
+                for aid in targets:
+                    self.account_manager.delete_account(aid)
             dialog.destroy()
-            self.refresh_list(self.search_var.get())
             self.on_new_callback()
 
         ctk.CTkButton(btn_frame, text="删除选中", width=120, height=34,
@@ -1,6 +1,12 @@
 import customtkinter as ctk
 
-from account_manager import AccountManager, TAG_OPTIONS
+from account_manager import (AccountManager, TAG_OPTIONS, CHANGE_UPDATED, CHANGE_TAGS,
+                             SORT_CREATED, SORT_UPDATED, SORT_LABELS, SORT_OPTIONS)
+from ui_virtual_list import VirtualList
+
+TAG_EMOJI = {"家庭组": "🏠", "成品号": "✅", "资格号": "⭐"}
+# Wait this long after the last keystroke before filtering
+SEARCH_DEBOUNCE_MS = 200
 
 
 class AccountSelectionPanel(ctk.CTkFrame):
@@ -12,9 +18,12 @@ class AccountSelectionPanel(ctk.CTkFrame):
         self.pack_propagate(False)
         self.account_manager = account_manager
 
-        self._sort_by = "created"
-        self._check_vars: list[tuple[str, ctk.BooleanVar]] = []
-        self._check_widgets: list[ctk.CTkCheckBox] = []
+        self._sort_by = SORT_CREATED
+        # Listed account ids in display order; everything listed is checked
+        # unless its id is in _unchecked
+        self._ids: list[str] = []
+        self._unchecked: set[str] = set()
+        self._stale = False
 
         # Header
         header = ctk.CTkFrame(self, fg_color="transparent")
@@ -28,7 +37,7 @@ class AccountSelectionPanel(ctk.CTkFrame):
         
         # Sort Button
         self._sort_btn = ctk.CTkButton(
-            title_row, text="导入序", width=54, height=28,
+            title_row, text=SORT_LABELS[SORT_CREATED], width=54, height=28,
             font=ctk.CTkFont(size=12, weight="bold"), corner_radius=6,
             fg_color=("gray85", "gray30"), hover_color=("gray75", "gray40"),
             text_color=("black", "white"),
@@ -68,25 +77,27 @@ class AccountSelectionPanel(ctk.CTkFrame):
 
         # Search filter
         self._search_var = ctk.StringVar()
-        self._search_var.trace_add("write", lambda *_: self.refresh())
+        self._search_after_id = None
+        self._search_var.trace_add("write", self._on_search_changed)
         
         search_frame = ctk.CTkFrame(self, fg_color="transparent")
         search_frame.pack(fill="x", padx=10, pady=(0, 8))
         
         ctk.CTkEntry(
             search_frame, textvariable=self._search_var, height=36,
-            placeholder_text="🔍 搜索邮箱...",
+            placeholder_text="🔍 搜索账号...",
             font=ctk.CTkFont(family="Segoe UI", size=13),
             border_width=1, corner_radius=8
         ).pack(fill="x")
 
-        # Scrollable checkbox list
-        self._scroll = ctk.CTkScrollableFrame(
-            self, corner_radius=6, 
+        # Virtualized checkbox list: checkboxes are pooled and rebound while scrolling
+        self._list = VirtualList(
+            self, row_height=30, corner_radius=6,
             fg_color=("gray95", "gray20"),
-            border_width=1, border_color=("gray80", "gray30")
+            border_width=1, border_color=("gray80", "gray30"),
+            create_row=self._create_row, bind_row=self._bind_row,
         )
-        self._scroll.pack(fill="both", expand=True, padx=10, pady=(0, 5))
+        self._list.pack(fill="both", expand=True, padx=10, pady=(0, 5))
 
         # Selected count
         self._selected_var = ctk.StringVar(value="已选: 0")
@@ -98,78 +109,128 @@ class AccountSelectionPanel(ctk.CTkFrame):
                      text_color=("gray50", "gray70")).pack(pady=2)
 
         self.refresh()
+        account_manager.subscribe(self._on_accounts_changed)
 
     # ── Public API ──────────────────────────────────────
 
     def refresh(self):
-        """Rebuild the checkbox list from current accounts."""
-        for w in self._check_widgets:
-            w.destroy()
-        self._check_widgets.clear()
-        self._check_vars.clear()
-
-        accounts = self.account_manager.get_all_accounts(sort_by=self._sort_by)
-        filter_text = self._search_var.get().strip().lower()
+        """Rebuild the checkbox list from current accounts.
+
+        Accounts that were already listed keep their checked state; new
+        ones start checked.
+        """
+        self._stale = False
+        ids = self.account_manager.search_account_ids(
+            self._search_var.get().strip(), sort_by=self._sort_by)
+
         tag_filter = self._tag_filter_var.get()
-        tag_map = {"家庭组": "🏠", "成品号": "✅", "资格号": "⭐"}
-
-        for acc in accounts:
-            email = acc["email"]
-            acc_tags = acc.get("tags", [])
-            
-            if filter_text and filter_text not in email.lower():
-                continue
-            if tag_filter != "全部" and tag_filter not in acc_tags:
-                continue
-            
-            # Tag badges
-            tag_badges = ""
-            if acc_tags:
-                tag_badges = " " + "".join(tag_map.get(t, "") for t in acc_tags)
-            var = ctk.BooleanVar(value=True)
-            var.trace_add("write", lambda *_: self._update_selected_count())
-            display = email if len(email) <= 25 else email[:22] + "..."
-            display += tag_badges
-            
-            cb = ctk.CTkCheckBox(
-                self._scroll, text=display, variable=var,
-                font=ctk.CTkFont(size=11), height=28, corner_radius=4,
-            )
-            cb.pack(fill="x", pady=1)
-            self._check_vars.append((acc["id"], var))
-            self._check_widgets.append(cb)
+        if tag_filter != "全部":
+            tagged = self.account_manager.query_tags(all_of=[tag_filter])
+            ids = [acc_id for acc_id in ids if acc_id in tagged]
 
+        self._ids = ids
+        self._unchecked.intersection_update(ids)
+        self._list.set_count(len(ids))
         self._update_selected_count()
 
+    def refresh_if_stale(self):
+        if self._stale:
+            self.refresh()
+
     def select_all(self):
-        for _, var in self._check_vars:
-            var.set(True)
+        self._unchecked.clear()
+        self._list.redraw()
+        self._update_selected_count()
 
     def select_none(self):
-        for _, var in self._check_vars:
-            var.set(False)
+        self._unchecked = set(self._ids)
+        self._list.redraw()
+        self._update_selected_count()
 
     def get_selected_accounts(self) -> list[dict]:
         """Return account dicts for checked items, preserving panel order."""
-        selected_ids = [aid for aid, var in self._check_vars if var.get()]
+        selected_ids = [aid for aid in self._ids if aid not in self._unchecked]
         if not selected_ids:
             return []
-        all_accounts = self.account_manager.get_all_accounts()
-        id_to_acc = {acc["id"]: acc for acc in all_accounts}
-        return [id_to_acc[aid] for aid in selected_ids if aid in id_to_acc]
+        accounts = (self.account_manager.get_account(aid) for aid in selected_ids)
+        return [acc for acc in accounts if acc is not None]
 
     # ── Internal ────────────────────────────────────────
 
     def _toggle_sort(self):
-        if self._sort_by == "created":
-            self._sort_by = "email"
-            self._sort_btn.configure(text="A→Z")
-        else:
-            self._sort_by = "created"
-            self._sort_btn.configure(text="导入序")
+        next_index = (SORT_OPTIONS.index(self._sort_by) + 1) % len(SORT_OPTIONS)
+        self._sort_by = SORT_OPTIONS[next_index]
+        self._sort_btn.configure(text=SORT_LABELS[self._sort_by])
         self.refresh()
 
+    @staticmethod
+    def _display_text(acc) -> str:
+        email = acc["email"]
+        display = email if len(email) <= 25 else email[:22] + "..."
+        acc_tags = acc.get("tags", [])
+        # Tag badges
+        if acc_tags:
+            display += " " + "".join(TAG_EMOJI.get(t, "") for t in acc_tags)
+        return display
+
+    def _on_search_changed(self, *args):
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(SEARCH_DEBOUNCE_MS, self._apply_search)
+
+    def _apply_search(self):
+        self._search_after_id = None
+        self.refresh()
+
+    def _on_accounts_changed(self, change):
+        if not self.winfo_viewable():
+            # Hidden tab: catch up when it is shown again
+            self._stale = True
+            return
+        if self._can_update_in_place(change):
+            # Only the rows on screen exist; rebinding them is enough
+            self._list.redraw()
+        else:
+            self.refresh()
+
+    def _can_update_in_place(self, change) -> bool:
+        """True when the change cannot add, remove or reorder visible rows."""
+        if change.kind == CHANGE_TAGS:
+            # Tags are matched by the search box as well as the tag filter,
+            # and a tag edit bumps updated_at
+            return (self._sort_by != SORT_UPDATED and self._tag_filter_var.get() == "全部"
+                    and not self._search_var.get().strip())
+        if change.kind == CHANGE_UPDATED:
+            # An edit can move a row under A→Z, 更新序 or a search filter
+            return self._sort_by == SORT_CREATED and not self._search_var.get().strip()
+        return False
+
+    def _create_row(self, parent):
+        cb = ctk.CTkCheckBox(parent, text="", font=ctk.CTkFont(size=11),
+                             height=28, corner_radius=4)
+        cb.configure(command=lambda: self._on_row_toggled(cb))
+        cb.account_id = None
+        return cb
+
+    def _bind_row(self, cb, index: int):
+        acc_id = self._ids[index]
+        acc = self.account_manager.get_account_view(acc_id)
+        if acc is None:
+            return
+        cb.account_id = acc_id
+        cb.configure(text=self._display_text(acc))
+        if acc_id in self._unchecked:
+            cb.deselect()
+        else:
+            cb.select()
+
+    def _on_row_toggled(self, cb):
+        if cb.get():
+            self._unchecked.discard(cb.account_id)
+        else:
+            self._unchecked.add(cb.account_id)
+        self._update_selected_count()
+
     def _update_selected_count(self):
-        count = sum(1 for _, var in self._check_vars if var.get())
-        total = len(self._check_vars)
-        self._selected_var.set(f"已选: {count}/{total}")
+        total = len(self._ids)
+        self._selected_var.set(f"已选: {total - len(self._unchecked)}/{total}")
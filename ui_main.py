@@ -1,24 +1,82 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-import shutil
 import os
+import time
 from datetime import datetime
+from typing import Callable
 
-from account_manager import AccountManager
-from excel_export import export_to_excel, import_from_excel
-from tab_manage import ManageTab
-from tab_totp_parallel import TotpParallelTab
-from tab_pwchange_parallel import PwChangeParallelTab
-from tab_family_parallel import FamilyParallelTab
-from tab_close_payment_parallel import ClosePaymentParallelTab
-from tab_check_ai_student_parallel import CheckAIStudentParallelTab
-from tab_batch_import import BatchImportTab
-from tab_gemini_login import GeminiLoginTab
+from account_manager import AccountManager, TAG_OPTIONS
+from background_job import JobRunner
+from excel_export import export_to_excel, count_excel_rows, iter_excel_rows
+from snapshot_store import SnapshotInfo, SnapshotStore
+from totp_engine import TOTPEngine
 from tab_log import LogTab
+from ui_snapshot_dialog import SnapshotDialog
+
+# Rows between progress updates (and cancel checks) in background jobs
+JOB_PROGRESS_EVERY = 500
+
+MANAGE_TAB = "👥 账号管理"
+IMPORT_TAB = "📥 批量导入"
+LOG_TAB = "📝 运行日志"
+
+# Snapshot directory next to the data file, and the label of the snapshot
+# taken automatically before every restore
+SNAPSHOT_DIR = "snapshots"
+PRE_RESTORE_LABEL = "恢复前自动快照"
+
+
+class PreRestoreSnapshotError(Exception):
+    """The snapshot taken before a restore failed; nothing was restored."""
+
+
+# Browser tab classes, imported on first selection. The imports are plain
+# statements (not importlib by name) so PyInstaller still bundles them.
+
+def _gemini_login_tab():
+    from tab_gemini_login import GeminiLoginTab
+    return GeminiLoginTab
+
+
+def _pwchange_parallel_tab():
+    from tab_pwchange_parallel import PwChangeParallelTab
+    return PwChangeParallelTab
+
+
+def _totp_parallel_tab():
+    from tab_totp_parallel import TotpParallelTab
+    return TotpParallelTab
+
+
+def _family_parallel_tab():
+    from tab_family_parallel import FamilyParallelTab
+    return FamilyParallelTab
+
+
+def _close_payment_tab():
+    from tab_close_payment_parallel import ClosePaymentParallelTab
+    return ClosePaymentParallelTab
+
+
+def _check_ai_student_tab():
+    from tab_check_ai_student_parallel import CheckAIStudentParallelTab
+    return CheckAIStudentParallelTab
+
+
+# Browser tabs: (title, attribute, class loader). They share one
+# constructor signature and are built on first selection.
+PARALLEL_TABS = [
+    ("🌐 Gemini 登录", "gemini_login_tab", _gemini_login_tab),
+    ("🔑 批量改密", "pwchange_parallel_tab", _pwchange_parallel_tab),
+    ("🔒 批量改2FA", "totp_parallel_tab", _totp_parallel_tab),
+    ("👨‍👩‍👧‍👦 批量家庭组", "family_parallel_tab", _family_parallel_tab),
+    ("💸 关闭支付", "close_payment_tab", _close_payment_tab),
+    ("✨ 查询学生资格", "check_ai_student_tab", _check_ai_student_tab),
+]
 
 
 class MainApplication(ctk.CTk):
-    def __init__(self):
+    def __init__(self, started_at: float | None = None):
         super().__init__()
         self.title("Gemini Account Manager")
         self.geometry("1100x820")
@@ -31,13 +89,26 @@ class MainApplication(ctk.CTk):
         ctk.set_default_color_theme("blue")
 
         self.account_manager = AccountManager()
+        self.snapshot_store = SnapshotStore(
+            os.path.join(os.path.dirname(self.account_manager.data_file), SNAPSHOT_DIR))
+        self._snapshot_dialog: SnapshotDialog | None = None
+        self.job_runner = JobRunner(self, on_busy_changed=self._on_job_busy_changed)
 
         # 先创建 tabs，再构建 toolbar（toolbar 引用 tab 方法）
         self._build_tabs()
         self._build_toolbar()
         self._build_status_bar()
-        self._start_totp_timer()
         self._update_status_count()
+        self._status_count_pending = False
+        self.account_manager.subscribe(self._on_accounts_changed)
+        # Deiconify: panels hidden while minimized may have pending refreshes
+        self.bind("<Map>", lambda e: self._on_tab_changed() if e.widget is self else None)
+        # Minimized: nothing to tick
+        self.bind("<Unmap>", lambda e: self._on_window_hidden() if e.widget is self else None)
+        if started_at is not None:
+            # The first idle callback runs once the window is drawn and usable
+            self.after_idle(lambda: self.log_tab.append(
+                f"启动完成，用时 {time.perf_counter() - started_at:.2f}s"))
 
     def _set_icon(self):
         """Set the application window icon (title bar + taskbar)."""
@@ -82,6 +153,12 @@ class MainApplication(ctk.CTk):
         ctk.CTkButton(grp_data, text="📤 恢复数据", width=100, **btn_style,
                       fg_color="#8e44ad", hover_color="#9b59b6",
                       command=self._on_restore_data).pack(side="left", padx=6)
+        ctk.CTkButton(grp_data, text="🕘 数据快照", width=100, **btn_style,
+                      fg_color="#8e44ad", hover_color="#9b59b6",
+                      command=self._on_snapshots).pack(side="left", padx=6)
+        ctk.CTkButton(grp_data, text="🔐 检查密钥", width=100, **btn_style,
+                      fg_color="#8e44ad", hover_color="#9b59b6",
+                      command=self._on_check_totp_secrets).pack(side="left", padx=6)
 
         # Excel Actions Group
         grp_excel = ctk.CTkFrame(toolbar, fg_color="transparent")
@@ -155,7 +232,8 @@ class MainApplication(ctk.CTk):
                                       segmented_button_selected_color="#2980b9",
                                       segmented_button_selected_hover_color="#1a5276",
                                       segmented_button_unselected_color=("gray85", "gray30"),
-                                      text_color=("gray30", "gray90"))
+                                      text_color=("gray30", "gray90"),
+                                      command=self._on_tab_changed)
         
         # Increase tab button font
         self.tabview._segmented_button.configure(font=ctk.CTkFont(family="Segoe UI", size=13, weight="bold"))
@@ -168,31 +246,73 @@ class MainApplication(ctk.CTk):
             if hasattr(self, 'log_tab'):
                 self.log_tab.append(msg)
 
-        self.manage_tab = ManageTab(
-            self.tabview.add("👥 账号管理"), self.account_manager,
-            _log_append, self._update_status, self._update_status_count
-        )
-
-        self.import_tab = BatchImportTab(
-            self.tabview.add("📥 批量导入"), self.account_manager,
-            self._update_status, self._update_status_count
-        )
-
         common_args = (self.account_manager, _log_append,
                        self._update_status, self._update_status_count)
 
-        self.gemini_login_tab = GeminiLoginTab(self.tabview.add("🌐 Gemini 登录"), *common_args)
-        self.pwchange_parallel_tab = PwChangeParallelTab(self.tabview.add("🔑 批量改密"), *common_args)
-        self.totp_parallel_tab = TotpParallelTab(self.tabview.add("🔒 批量改2FA"), *common_args)
-        
-        self.family_parallel_tab = FamilyParallelTab(self.tabview.add("👨‍👩‍👧‍👦 批量家庭组"), *common_args)
-        self.close_payment_tab = ClosePaymentParallelTab(self.tabview.add("💸 关闭支付"), *common_args)
-        self.check_ai_student_tab = CheckAIStudentParallelTab(self.tabview.add("✨ 查询学生资格"), *common_args)
-
-        # Log tab goes last — visually the rightmost tab
-        self.log_tab = LogTab(self.tabview.add("📝 运行日志"))
-
-        self.tabview.set("👥 账号管理")
+        def manage_tab(parent):
+            from tab_manage import ManageTab
+            tab = ManageTab(parent, *common_args)
+            return tab, tab
+
+        def import_tab(parent):
+            from tab_batch_import import BatchImportTab
+            tab = BatchImportTab(parent, self.account_manager,
+                                 self._update_status, self._update_status_count,
+                                 job_runner=self.job_runner)
+            return tab, tab.selector_panel
+
+        def parallel_tab(load_class: Callable):
+            def build(parent):
+                tab = load_class()(parent, *common_args)
+                return tab, tab.selector
+            return build
+
+        # title -> (attribute, factory); a factory builds the tab into its
+        # frame and returns (tab, account panel). Removed once built.
+        self._tab_factories: dict[str, tuple[str, Callable]] = {}
+        # Panels that skip change notifications while their tab is hidden
+        self._stale_panels = {}
+
+        tabs = [(MANAGE_TAB, "manage_tab", manage_tab),
+                (IMPORT_TAB, "import_tab", import_tab)]
+        tabs += [(title, attr, parallel_tab(load_class))
+                 for title, attr, load_class in PARALLEL_TABS]
+        for title, attr, factory in tabs:
+            self.tabview.add(title)
+            self._tab_factories[title] = (attr, factory)
+
+        # Log tab goes last — visually the rightmost tab. It is built right
+        # away so messages from the other tabs are never dropped.
+        self.log_tab = LogTab(self.tabview.add(LOG_TAB))
+
+        self.tabview.set(MANAGE_TAB)
+        self._ensure_tab(MANAGE_TAB)
+
+    def _ensure_tab(self, title: str) -> None:
+        """Build the tab behind *title* if this is its first selection."""
+        entry = self._tab_factories.pop(title, None)
+        if entry is None:
+            return
+        attr, factory = entry
+        tab, panel = factory(self.tabview.tab(title))
+        setattr(self, attr, tab)
+        self._stale_panels[title] = panel
+
+    def _on_tab_changed(self):
+        current = self.tabview.get()
+        if current in self._tab_factories:
+            # Freshly built panels render the current data; nothing is stale
+            self._ensure_tab(current)
+        else:
+            panel = self._stale_panels.get(current)
+            if panel is not None:
+                panel.refresh_if_stale()
+        # The 2FA code only needs its timers while the manage tab is shown
+        if hasattr(self, "manage_tab"):
+            self.manage_tab.totp_display.set_active(current == MANAGE_TAB)
+
+    def _on_window_hidden(self):
+        self.manage_tab.totp_display.set_active(False)
 
 
     def _build_status_bar(self):
@@ -207,6 +327,11 @@ class MainApplication(ctk.CTk):
         ctk.CTkLabel(bar, text="ℹ️", font=ctk.CTkFont(size=16)).pack(side="left", padx=(15, 5))
         ctk.CTkLabel(bar, textvariable=self.status_left, anchor="w",
                      font=ctk.CTkFont(family="Segoe UI", size=13)).pack(side="left", padx=5)
+        # Shown only while a background job runs
+        self._cancel_job_btn = ctk.CTkButton(
+            bar, text="取消", width=60, height=24, font=ctk.CTkFont(size=12),
+            fg_color=("gray70", "gray35"), hover_color=("gray60", "gray45"),
+            command=self.job_runner.cancel)
         
         ctk.CTkLabel(bar, textvariable=self.status_right, anchor="e",
                      font=ctk.CTkFont(family="Consolas", size=12, weight="bold"),
@@ -217,38 +342,25 @@ class MainApplication(ctk.CTk):
     def _update_status(self, message: str):
         self.status_left.set(message)
 
+    def _on_accounts_changed(self, change):
+        # A commit publishes one change per kind; refresh the counts once
+        if not self._status_count_pending:
+            self._status_count_pending = True
+            self.after_idle(self._flush_status_count)
+
+    def _flush_status_count(self):
+        self._status_count_pending = False
+        self._update_status_count()
+
     def _update_status_count(self):
-        accounts = self.account_manager.get_all_accounts()
-        total = len(accounts)
-        with_totp = sum(1 for acc in accounts if acc.get("totp_secret"))
+        total = self.account_manager.account_count()
+        with_totp = self.account_manager.totp_count()
         no_totp = total - with_totp
-        self.status_right.set(f"总计: {total} | 有TOTP: {with_totp} | 无TOTP: {no_totp}")
-
-        # 刷新各子系统的账号列表
-        if hasattr(self, 'manage_tab'):
-            self.manage_tab.refresh()
-        if hasattr(self, 'gemini_login_tab'):
-            self.gemini_login_tab.selector.refresh()
-        if hasattr(self, 'pwchange_parallel_tab'):
-            self.pwchange_parallel_tab.selector.refresh()
-        if hasattr(self, 'totp_parallel_tab'):
-            self.totp_parallel_tab.selector.refresh()
-        if hasattr(self, 'family_parallel_tab'):
-            self.family_parallel_tab.selector.refresh()
-        if hasattr(self, 'close_payment_tab'):
-            self.close_payment_tab.selector.refresh()
-        if hasattr(self, 'check_ai_student_tab'):
-            self.check_ai_student_tab.selector.refresh()
-
-    # ── TOTP 计时器 ───────────────────────────────────────
-
-    def _start_totp_timer(self):
-        self._tick_totp()
-
-    def _tick_totp(self):
-        if hasattr(self, 'manage_tab') and self.manage_tab.totp_display:
-            self.manage_tab.totp_display.tick()
-        self.after(1000, self._tick_totp)
+        tag_counts = self.account_manager.tag_counts()
+        tag_text = " | ".join(f"{tag}: {tag_counts.get(tag, 0)}" for tag in TAG_OPTIONS)
+        self.status_right.set(
+            f"总计: {total} | 有TOTP: {with_totp} | 无TOTP: {no_totp} | {tag_text}")
+        # 各面板的账号列表通过 AccountManager 的变更通知自行增量刷新
 
     # ── 外观切换 ──────────────────────────────────────────
 
@@ -256,81 +368,353 @@ class MainApplication(ctk.CTk):
         mode_map = {"深色": "dark", "浅色": "light", "跟随系统": "system"}
         ctk.set_appearance_mode(mode_map.get(choice, "dark"))
 
+    # ── 后台任务 ──────────────────────────────────────────
+
+    def _job_busy(self) -> bool:
+        if self.job_runner.busy:
+            messagebox.showinfo("提示", "已有后台任务在进行中，请稍候或先取消")
+            return True
+        return False
+
+    def _on_job_busy_changed(self, busy: bool):
+        if busy:
+            self._cancel_job_btn.pack(side="left", padx=5)
+        else:
+            self._cancel_job_btn.pack_forget()
+
+    def _show_job_progress(self, label: str):
+        def on_progress(done: int, total: int | None):
+            suffix = f"/{total}" if total else ""
+            self._update_status(f"{label}... {done}{suffix}")
+        return on_progress
+
+    def _on_job_cancelled(self, label: str):
+        self._update_status(f"已取消{label}")
+
     # ── Excel 导入导出 ────────────────────────────────────
 
     def _on_export_excel(self):
+        if self._job_busy():
+            return
         filepath = filedialog.asksaveasfilename(
             title="导出到 Excel", defaultextension=".xlsx",
             filetypes=[("Excel 文件", "*.xlsx")],
         )
         if not filepath:
             return
-        try:
-            accounts = self.account_manager.get_all_accounts()
-            export_to_excel(accounts, filepath)
-            messagebox.showinfo("导出成功", f"已导出 {len(accounts)} 个账号到:\n{filepath}")
-            self._update_status(f"已导出 {len(accounts)} 个账号")
-        except Exception as e:
-            messagebox.showerror("导出失败", str(e))
+        accounts = self.account_manager.snapshot()
+        total = len(accounts)
+
+        def work(job):
+            def rows():
+                for n, acc in enumerate(accounts, start=1):
+                    if n % JOB_PROGRESS_EVERY == 0:
+                        job.check_cancelled()
+                        job.progress(n, total)
+                    yield acc
+            # A write-only workbook only creates the file in save(), so a
+            # cancelled export leaves nothing behind
+            return export_to_excel(rows(), filepath)
+
+        def on_done(count: int):
+            self._update_status(f"已导出 {count} 个账号")
+            messagebox.showinfo("导出成功", f"已导出 {count} 个账号到:\n{filepath}")
+
+        self._update_status("正在导出 Excel...")
+        self.job_runner.start(
+            "导出 Excel", work, on_done,
+            on_error=lambda e: messagebox.showerror("导出失败", str(e)),
+            on_progress=self._show_job_progress("正在导出 Excel"),
+            on_cancelled=lambda: self._on_job_cancelled("导出 Excel"),
+        )
 
     def _on_import_excel(self):
+        if self._job_busy():
+            return
         filepath = filedialog.askopenfilename(
             title="从 Excel 导入", filetypes=[("Excel 文件", "*.xlsx")],
         )
         if not filepath:
             return
+
+        def work(job):
+            """Parse and validate the sheet off the Tk thread."""
+            total = count_excel_rows(filepath)
+            accounts, errors = [], []
+            seen = set()
+            file_dups = 0
+            for n, item in enumerate(iter_excel_rows(filepath), start=1):
+                if item.account is None:
+                    errors.append(f"第 {item.row} 行: {item.error}")
+                else:
+                    key = item.account["email"].lower()
+                    if key in seen:
+                        file_dups += 1
+                    else:
+                        seen.add(key)
+                        accounts.append(item.account)
+                if n % JOB_PROGRESS_EVERY == 0:
+                    job.check_cancelled()
+                    job.progress(n, total)
+            return accounts, errors, file_dups
+
+        def on_error(e: Exception):
+            self._update_status("Excel 导入失败")
+            messagebox.showerror("导入失败", str(e))
+
+        self._update_status("正在读取 Excel...")
+        self.job_runner.start(
+            "导入 Excel", work, lambda result: self._finish_excel_import(*result),
+            on_error=on_error,
+            on_progress=self._show_job_progress("正在读取 Excel"),
+            on_cancelled=lambda: self._on_job_cancelled("导入 Excel"),
+        )
+
+    def _finish_excel_import(self, accounts: list[dict], errors: list[str], file_dups: int):
+        # Dedup against the store here, on the Tk thread, so it sees the
+        # accounts as they are at commit time
+        has_email = self.account_manager.has_email
+        new_accounts = [acc for acc in accounts if not has_email(acc["email"])]
+        existing = len(accounts) - len(new_accounts)
+
+        summary = f"新账号: {len(new_accounts)}"
+        if existing:
+            summary += f"\n已存在（跳过）: {existing}"
+        if file_dups:
+            summary += f"\n文件内重复（跳过）: {file_dups}"
+        if errors:
+            summary += f"\n无效行（跳过）: {len(errors)}\n" + "\n".join(errors[:5])
+            if len(errors) > 5:
+                summary += f"\n...等共 {len(errors)} 行"
+
+        if not new_accounts:
+            self._update_status("Excel 中没有可导入的新账号")
+            messagebox.showinfo("导入", "文件中没有找到可导入的新账号\n\n" + summary)
+            return
+        if not messagebox.askyesno("确认导入", summary + "\n\n是否导入新账号？"):
+            self._update_status("已取消 Excel 导入")
+            return
         try:
-            imported = import_from_excel(filepath)
-            if not imported:
-                messagebox.showinfo("导入", "文件中没有找到有效的账号数据")
-                return
-            if not messagebox.askyesno("确认导入", f"将导入 {len(imported)} 个账号，是否继续？"):
-                return
-            for acc in imported:
-                self.account_manager.add_account(
-                    email=acc.get("email", ""),
-                    password=acc.get("password", ""),
-                    recovery_email=acc.get("recovery_email", ""),
-                    totp_secret=acc.get("totp_secret", ""),
-                    notes=acc.get("notes", ""),
-                )
-            self._update_status_count()
-            messagebox.showinfo("导入成功", f"已导入 {len(imported)} 个账号")
+            count = self.account_manager.add_accounts(new_accounts)
         except Exception as e:
             messagebox.showerror("导入失败", str(e))
+            return
+        self._update_status(f"已从 Excel 导入 {count} 个账号")
+        messagebox.showinfo("导入成功", f"已导入 {count} 个账号")
+
+    # ── 2FA 密钥检查 ──────────────────────────────────────
+
+    def _on_check_totp_secrets(self):
+        report = TOTPEngine.check_secrets(
+            (acc["id"], acc.get("totp_secret", ""))
+            for acc in self.account_manager.iter_accounts())
+        view = self.account_manager.get_account_view
+
+        def emails(ids: list[str], limit: int = 5) -> str:
+            text = "\n".join("  " + view(acc_id)["email"] for acc_id in ids[:limit])
+            if len(ids) > limit:
+                text += f"\n  ...等共 {len(ids)} 个"
+            return text
+
+        lines = [f"已检查 {report.checked} 个 2FA 密钥"]
+        if report.invalid:
+            lines.append(f"无效密钥: {len(report.invalid)} 个\n" + emails(report.invalid))
+        if report.duplicates:
+            shared = list(report.duplicates.values())
+            lines.append(f"多个账号共用同一密钥: {len(shared)} 组\n"
+                         + emails([acc_id for ids in shared for acc_id in ids]))
+        if report.normalized:
+            detail = f"（其中填充错误 {len(report.bad_padding)} 个）" if report.bad_padding else ""
+            lines.append(f"格式需规范化（空格 / 小写 / 填充）: {len(report.normalized)} 个{detail}")
+        summary = "\n\n".join(lines)
+
+        if not report.normalized:
+            messagebox.showinfo("密钥检查", summary)
+            return
+        if not messagebox.askyesno("密钥检查", summary + "\n\n是否立即规范化这些密钥？"):
+            return
+        try:
+            with self.account_manager.batch():
+                for acc_id, secret in report.normalized.items():
+                    self.account_manager.update_account(acc_id, totp_secret=secret)
+        except Exception as e:
+            messagebox.showerror("规范化失败", f"已回滚，未写入任何数据：\n{e}")
+            return
+        self._update_status(f"已规范化 {len(report.normalized)} 个 2FA 密钥")
 
     # ── 备份/恢复 ─────────────────────────────────────────
 
     def _on_backup_data(self):
-        src = self.account_manager.data_file
-        if not os.path.exists(src):
-            messagebox.showinfo("提示", "当前没有数据文件可备份")
+        if self.account_manager.account_count() == 0:
+            messagebox.showinfo("提示", "当前没有数据可备份")
             return
+        if self._job_busy():
+            return
+        suffix = self.account_manager.backup_suffix
         dst = filedialog.asksaveasfilename(
             title="备份数据",
-            defaultextension=".json",
-            initialfile=f"accounts_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            filetypes=[("JSON 文件", "*.json")]
+            defaultextension=suffix,
+            initialfile=f"accounts_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}",
+            filetypes=[("备份文件", f"*{suffix}")]
         )
-        if dst:
-            shutil.copy2(src, dst)
+        if not dst:
+            return
+        accounts = self.account_manager.snapshot()
+
+        def work(job):
+            job.check_cancelled()
+            self.account_manager.backup_to(dst, accounts)
+
+        def on_done(_):
+            self._update_status("备份完成")
             messagebox.showinfo("成功", f"数据已备份到:\n{dst}")
 
+        self._update_status("正在备份...")
+        self.job_runner.start(
+            "备份", work, on_done,
+            on_error=lambda e: messagebox.showerror("备份失败", str(e)),
+            on_cancelled=lambda: self._on_job_cancelled("备份"),
+        )
+
     def _on_restore_data(self):
+        if self._job_busy():
+            return
         src = filedialog.askopenfilename(
             title="恢复数据（将覆盖当前数据！）",
-            filetypes=[("JSON 文件", "*.json")]
+            filetypes=[("备份文件", "*.json *.json.gz *.json.zst"), ("所有文件", "*.*")]
         )
         if not src:
             return
-        if not messagebox.askyesno("危险操作", "确定要恢复此备份吗？\n当前所有数据将被覆盖且无法找回！"):
+        if not messagebox.askyesno("危险操作", "确定要恢复此备份吗？\n当前所有数据将被覆盖"
+                                               "（恢复前会自动创建快照，可在「数据快照」中找回）"):
             return
+        current = self.account_manager.snapshot()
 
-        shutil.copy2(src, self.account_manager.data_file)
-        self.account_manager.load()  # 重新加载到内存
-        self._update_status_count()
-        messagebox.showinfo("成功", "数据已恢复，界面已刷新")
+        def work(job):
+            accounts = self.account_manager.read_backup(src)
+            job.check_cancelled()
+            self._pre_restore_snapshot(current)
+            return accounts
 
+        def on_done(accounts: list[dict]):
+            # Swapping the store in stays on the Tk thread
+            self.account_manager.restore_accounts(accounts)
+            self._update_status_count()
+            self._update_status("数据已恢复")
+            messagebox.showinfo("成功", "数据已恢复，界面已刷新")
+
+        def on_error(e: Exception):
+            self._update_status("恢复失败")
+            if isinstance(e, PreRestoreSnapshotError):
+                messagebox.showerror("恢复失败", f"恢复前自动快照失败，未恢复任何数据:\n{e}")
+            else:
+                messagebox.showerror("恢复失败", f"备份文件无法读取:\n{e}")
+
+        self._update_status("正在读取备份...")
+        self.job_runner.start(
+            "恢复", work, on_done,
+            on_error=on_error,
+            on_cancelled=lambda: self._on_job_cancelled("恢复"),
+        )
+
+    def _pre_restore_snapshot(self, accounts: list[dict]):
+        """Snapshot *accounts* before a restore (runs in a background job)."""
+        try:
+            self.snapshot_store.create(accounts, PRE_RESTORE_LABEL)
+        except Exception as e:
+            raise PreRestoreSnapshotError(e) from e
+
+    # ── 快照 ──────────────────────────────────────────────
+
+    def _on_snapshots(self):
+        if self._job_busy():
+            return
+
+        def on_done(history):
+            self._update_status("就绪")
+            self._snapshot_dialog = SnapshotDialog(
+                self, history, self._create_snapshot, self._restore_snapshot)
+
+        self._update_status("正在读取快照...")
+        self.job_runner.start(
+            "读取快照", lambda job: self.snapshot_store.history(), on_done,
+            on_error=lambda e: messagebox.showerror("读取快照失败", str(e)),
+        )
+
+    def _refresh_snapshot_dialog(self):
+        dialog = self._snapshot_dialog
+        if dialog is None or not dialog.winfo_exists():
+            return
+        self.job_runner.start(
+            "读取快照", lambda job: self.snapshot_store.history(), dialog.set_history,
+            on_error=lambda e: messagebox.showerror("读取快照失败", str(e), parent=dialog),
+        )
+
+    def _create_snapshot(self, label: str):
+        if self._job_busy():
+            return
+        accounts = self.account_manager.snapshot()
+
+        def on_done(info: SnapshotInfo | None):
+            if info is None:
+                self._update_status("数据与最近一次快照相同，未创建新快照")
+            else:
+                self._update_status(f"快照已创建（新存储 {info.stored} 个账号）")
+            self._refresh_snapshot_dialog()
+
+        self._update_status("正在创建快照...")
+        self.job_runner.start(
+            "创建快照", lambda job: self.snapshot_store.create(accounts, label), on_done,
+            on_error=lambda e: messagebox.showerror("创建快照失败", str(e)),
+        )
+
+    def _restore_snapshot(self, info: SnapshotInfo):
+        if self._job_busy():
+            return
+        parent = self._snapshot_dialog
+
+        def confirm(diff):
+            if not diff:
+                messagebox.showinfo("提示", "当前数据与此快照相同，无需恢复", parent=parent)
+                return
+            when = info.created_at.replace("T", " ")
+            if not messagebox.askyesno(
+                    "恢复快照",
+                    f"恢复到 {when} 的快照？\n\n将新增 {len(diff.added)} 个、删除 {len(diff.removed)} 个、"
+                    f"修改 {len(diff.changed)} 个账号。\n恢复前会自动为当前数据创建快照。",
+                    parent=parent):
+                return
+            current = self.account_manager.snapshot()
+
+            def work(job):
+                self._pre_restore_snapshot(current)
+                return self.snapshot_store.restore(info.name)
+
+            def on_error(e: Exception):
+                self._update_status("恢复失败")
+                if isinstance(e, PreRestoreSnapshotError):
+                    messagebox.showerror("恢复失败", f"恢复前自动快照失败，未恢复任何数据:\n{e}",
+                                         parent=parent)
+                else:
+                    messagebox.showerror("恢复失败", str(e), parent=parent)
+
+            def on_done(accounts: list[dict]):
+                self.account_manager.restore_accounts(accounts)
+                self._update_status("已恢复快照")
+                self._refresh_snapshot_dialog()
+
+            self._update_status("正在恢复快照...")
+            self.job_runner.start(
+                "恢复快照", work, on_done,
+                on_error=on_error,
+            )
+
+        accounts = self.account_manager.snapshot()
+        self._update_status("正在比较快照...")
+        self.job_runner.start(
+            "比较快照", lambda job: self.snapshot_store.diff_with(info.name, accounts), confirm,
+            on_error=lambda e: messagebox.showerror("读取快照失败", str(e), parent=parent),
+        )
 
 if __name__ == "__main__":
     app = MainApplication()
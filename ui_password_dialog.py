@@ -1,6 +1,9 @@
 import customtkinter as ctk
 
-from password_generator import generate_password
+from password_generator import PasswordPolicy, generate_password
+
+# Policies weaker than this are refused (8 lowercase letters is ~38 bits)
+MIN_ENTROPY_BITS = 40
 
 
 class PasswordGeneratorDialog(ctk.CTkToplevel):
@@ -8,7 +11,7 @@ class PasswordGeneratorDialog(ctk.CTkToplevel):
         super().__init__(parent)
         self.callback = callback
         self.title("密码生成器")
-        self.geometry("450x380")
+        self.geometry("450x440")
         self.resizable(False, False)
         self.transient(parent)
         self.grab_set()
@@ -38,18 +41,24 @@ class PasswordGeneratorDialog(ctk.CTkToplevel):
         self.lower_var = ctk.BooleanVar(value=True)
         self.digit_var = ctk.BooleanVar(value=True)
         self.special_var = ctk.BooleanVar(value=True)
+        self.ambiguous_var = ctk.BooleanVar(value=False)
 
         checks = [
             ("大写字母 A-Z", self.upper_var),
             ("小写字母 a-z", self.lower_var),
             ("数字 0-9", self.digit_var),
             ("特殊字符 !@#$...", self.special_var),
+            ("排除易混淆字符 0O1lI|", self.ambiguous_var),
         ]
         for text, var in checks:
             ctk.CTkCheckBox(type_frame, text=text, variable=var,
                             font=ctk.CTkFont(size=12)).pack(anchor="w", padx=20, pady=2)
-        # bottom padding in type_frame
-        ctk.CTkLabel(type_frame, text="", height=5).pack()
+        self.entropy_label = ctk.CTkLabel(type_frame, text="", font=ctk.CTkFont(size=11),
+                                          text_color="gray")
+        self.entropy_label.pack(anchor="w", padx=20, pady=(4, 8))
+        for var in (self.length_var, self.upper_var, self.lower_var,
+                    self.digit_var, self.special_var, self.ambiguous_var):
+            var.trace_add("write", lambda *_: self._update_entropy())
 
         # Result
         result_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -71,17 +80,29 @@ class PasswordGeneratorDialog(ctk.CTkToplevel):
         ctk.CTkButton(btn_frame, text="取消", width=80, fg_color="gray",
                       hover_color="#666", command=self.destroy).pack(side="right")
 
+        self._update_entropy()
         self._generate()
 
+    def _policy(self) -> PasswordPolicy:
+        return PasswordPolicy(
+            length=self.length_var.get(),
+            use_uppercase=self.upper_var.get(),
+            use_lowercase=self.lower_var.get(),
+            use_digits=self.digit_var.get(),
+            use_special=self.special_var.get(),
+            exclude_ambiguous=self.ambiguous_var.get(),
+            min_entropy=MIN_ENTROPY_BITS,
+        )
+
+    def _update_entropy(self):
+        bits = self._policy().entropy_bits()
+        color = "gray" if bits >= MIN_ENTROPY_BITS else "#e74c3c"
+        self.entropy_label.configure(text=f"熵: {bits:.0f} 位 (最低 {MIN_ENTROPY_BITS} 位)",
+                                     text_color=color)
+
     def _generate(self):
         try:
-            pw = generate_password(
-                length=self.length_var.get(),
-                use_uppercase=self.upper_var.get(),
-                use_lowercase=self.lower_var.get(),
-                use_digits=self.digit_var.get(),
-                use_special=self.special_var.get(),
-            )
+            pw = generate_password(policy=self._policy())
             self.result_var.set(pw)
         except ValueError as e:
             self.result_var.set(f"错误: {e}")
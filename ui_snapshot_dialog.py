@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import customtkinter as ctk
+
+from snapshot_store import SnapshotDiff, SnapshotInfo
+
+
+class SnapshotDialog(ctk.CTkToplevel):
+    """Lists the kept snapshots with their changes.
+
+    Creating and restoring run as background jobs owned by the caller:
+    on_create(label) and on_restore(info) start them, and the caller hands
+    the refreshed list back through set_history().
+    """
+
+    def __init__(self, parent, history: list[tuple[SnapshotInfo, SnapshotDiff]],
+                 on_create, on_restore):
+        super().__init__(parent)
+        self.on_create = on_create
+        self.on_restore = on_restore
+        self.title("数据快照")
+        self.geometry("620x480")
+        self.transient(parent)
+        self.grab_set()
+        self.after(10, self.focus_force)
+
+        ctk.CTkLabel(self, text="快照只保存变化的账号；恢复前会自动创建一份当前数据的快照。",
+                     font=ctk.CTkFont(size=12), text_color="gray").pack(
+            anchor="w", padx=20, pady=(15, 5))
+
+        self.list_frame = ctk.CTkScrollableFrame(self, corner_radius=6)
+        self.list_frame.pack(fill="both", expand=True, padx=20, pady=(0, 10))
+
+        # Create
+        create_frame = ctk.CTkFrame(self, fg_color="transparent")
+        create_frame.pack(fill="x", padx=20, pady=(0, 15))
+        self.label_var = ctk.StringVar()
+        ctk.CTkEntry(create_frame, textvariable=self.label_var, height=32,
+                     placeholder_text="快照备注（可选）").pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(create_frame, text="创建快照", width=100, height=32, fg_color="#2ecc71",
+                      hover_color="#27ae60", command=self._create).pack(side="left", padx=(10, 0))
+        ctk.CTkButton(create_frame, text="关闭", width=80, height=32, fg_color="gray",
+                      hover_color="#666", command=self.destroy).pack(side="left", padx=(10, 0))
+
+        self.set_history(history)
+
+    def set_history(self, history: list[tuple[SnapshotInfo, SnapshotDiff]]):
+        """Show *history* as returned by SnapshotStore.history()."""
+        if not self.winfo_exists():
+            return
+        for child in self.list_frame.winfo_children():
+            child.destroy()
+        if not history:
+            ctk.CTkLabel(self.list_frame, text="暂无快照", text_color="gray").pack(pady=20)
+            return
+        for info, diff in history:
+            self._add_row(info, diff)
+
+    def _add_row(self, info: SnapshotInfo, diff: SnapshotDiff):
+        row = ctk.CTkFrame(self.list_frame, corner_radius=6)
+        row.pack(fill="x", pady=3)
+        when = datetime.fromisoformat(info.created_at).strftime("%Y-%m-%d %H:%M:%S")
+        title = f"{when}  {info.label}" if info.label else when
+        ctk.CTkLabel(row, text=title, font=ctk.CTkFont(size=13, weight="bold")).pack(
+            anchor="w", padx=12, pady=(6, 0))
+        detail = (f"{info.count} 个账号 | 新增 {len(diff.added)} / 删除 {len(diff.removed)}"
+                  f" / 修改 {len(diff.changed)}（相对上一快照）")
+        ctk.CTkLabel(row, text=detail, font=ctk.CTkFont(size=11), text_color="gray").pack(
+            side="left", padx=12, pady=(0, 6))
+        ctk.CTkButton(row, text="恢复", width=60, height=26, fg_color="#8e44ad",
+                      hover_color="#9b59b6",
+                      command=lambda: self.on_restore(info)).pack(side="right", padx=10, pady=(0, 6))
+
+    def _create(self):
+        self.on_create(self.label_var.get().strip())
+        self.label_var.set("")
@@ -1,6 +1,8 @@
+import time
+
 import customtkinter as ctk
 
-from totp_engine import TOTPEngine
+from totp_engine import PERIOD, TOTPEngine
 
 
 class TOTPDisplay(ctk.CTkFrame):
@@ -9,6 +11,10 @@ class TOTPDisplay(ctk.CTkFrame):
         super().__init__(parent, fg_color=("gray95", "gray15"))
         self.current_secret = ""
         self.status_callback = status_callback
+        self._active = True
+        self._code_after_id = None
+        self._countdown_after_id = None
+        self._shown_remaining = None
 
         title_frame = ctk.CTkFrame(self, fg_color=("gray95", "gray15"))
         title_frame.pack(fill="x", pady=(0, 5))
@@ -56,27 +62,79 @@ class TOTPDisplay(ctk.CTkFrame):
     def set_secret(self, secret: str):
         self.current_secret = secret.strip() if secret else ""
         if self.current_secret:
-            self.tick()
+            self._refresh_code()
         else:
             self.clear()
 
     def clear(self):
         self.current_secret = ""
+        self._cancel_timers()
         self.code_var.set("— — — — — —")
         self.seconds_var.set("")
         self.progress_var.set(1.0)
 
-    def tick(self):
-        if not self.current_secret:
+    def set_active(self, active: bool):
+        """Run the timers only while the display can be seen."""
+        if active == self._active:
             return
-        remaining = TOTPEngine.get_remaining_seconds()
-        code = TOTPEngine.generate_code(self.current_secret)
-        if code:
-            spaced = "  ".join(code[:3]) + "   " + "  ".join(code[3:])
-            self.code_var.set(spaced)
-            self.progress_var.set(remaining / 30.0)
-            self.seconds_var.set(f"{remaining}s 后刷新")
+        self._active = active
+        if active and self.current_secret:
+            self._refresh_code()
         else:
+            self._cancel_timers()
+
+    def tick(self):
+        """Redraw code and countdown now; timers keep it current afterwards."""
+        if self.current_secret:
+            self._refresh_code()
+
+    # ── Timers ────────────────────────────────────────────
+    # The code only changes at 30 s window boundaries, so it is recomputed
+    # exactly then; the countdown is a separate once-a-second label update.
+
+    def _cancel_timers(self):
+        self._shown_remaining = None
+        for attr in ("_code_after_id", "_countdown_after_id"):
+            after_id = getattr(self, attr)
+            if after_id is not None:
+                self.after_cancel(after_id)
+                setattr(self, attr, None)
+
+    def _refresh_code(self):
+        self._cancel_timers()
+        now = time.time()
+        code = TOTPEngine.generate_code(self.current_secret, for_time=now)
+        if not code:
             self.code_var.set("密钥无效")
             self.seconds_var.set("")
             self.progress_var.set(0)
+            return
+        self.code_var.set("  ".join(code[:3]) + "   " + "  ".join(code[3:]))
+        self._update_countdown(now)
+        if not self._active:
+            return
+        # Small margin so the timer never fires just before the boundary
+        until_boundary = PERIOD - now % PERIOD
+        self._code_after_id = self.after(int(until_boundary * 1000) + 20, self._on_code_timer)
+        self._schedule_countdown(now)
+
+    def _on_code_timer(self):
+        self._code_after_id = None
+        self._refresh_code()
+
+    def _update_countdown(self, now: float):
+        remaining = PERIOD - int(now) % PERIOD
+        if remaining != self._shown_remaining:
+            self._shown_remaining = remaining
+            self.progress_var.set(remaining / PERIOD)
+            self.seconds_var.set(f"{remaining}s 后刷新")
+
+    def _schedule_countdown(self, now: float):
+        until_next_second = 1 - now % 1
+        self._countdown_after_id = self.after(int(until_next_second * 1000) + 5,
+                                              self._on_countdown_timer)
+
+    def _on_countdown_timer(self):
+        now = time.time()
+        self._update_countdown(now)
+        self._schedule_countdown(now)
@@ -0,0 +1,138 @@
+import math
+import sys
+
+import customtkinter as ctk
+
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only creates widgets for the rows on screen.
+
+    The caller supplies two callbacks:
+      create_row(parent) -> widget   builds one reusable row widget
+      bind_row(row, index)           fills a pooled row with item *index*
+
+    Rows are laid out with place() at a fixed ``row_height``; scrolling just
+    moves and rebinds the pooled rows, so the widget count stays at roughly
+    one screenful no matter how many items there are.
+    """
+
+    def __init__(self, parent, row_height: int, create_row, bind_row, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.row_height = row_height
+        self._create_row = create_row
+        self._bind_row = bind_row
+        self._count = 0
+        self._offset = 0  # pixels scrolled from the top
+        self._pool: list = []
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self._viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self._viewport.grid(row=0, column=0, sticky="nsew", padx=(4, 0), pady=4)
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=0, column=1, sticky="ns", padx=(0, 2), pady=4)
+
+        self._viewport.bind("<Configure>", lambda e: self._layout())
+        # Same approach as CTkScrollableFrame: one global binding, filtered
+        # to events over this list
+        self._wheel_bindings = [
+            (sequence, self.bind_all(sequence, self._on_mouse_wheel, add="+"))
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>")]
+
+    # ── Public API ─────────────────────────────────────────
+
+    def destroy(self):
+        # Drop only our own global bindings; unbind_all() would also remove
+        # those of other lists and scrollable frames
+        for sequence, funcid in self._wheel_bindings:
+            script = self.tk.call("bind", "all", sequence)
+            kept = "\n".join(line for line in script.split("\n") if funcid not in line)
+            self.tk.call("bind", "all", sequence, kept)
+        self._wheel_bindings = []
+        super().destroy()
+
+    def set_count(self, count: int):
+        """Set the number of items and rebind the visible rows."""
+        self._count = count
+        self._offset = min(self._offset, self._max_offset())
+        self._layout()
+
+    def redraw(self):
+        """Rebind the visible rows without changing count or scroll position."""
+        self._layout()
+
+    def scroll_to_index(self, index: int):
+        """Scroll just enough to make item *index* visible."""
+        top = index * self.row_height
+        height = self._viewport.winfo_height()
+        if top < self._offset:
+            self._offset = top
+        elif top + self.row_height > self._offset + height:
+            self._offset = top + self.row_height - height
+        self._offset = max(0, min(self._offset, self._max_offset()))
+        self._layout()
+
+    # ── Internal ───────────────────────────────────────────
+
+    def _max_offset(self) -> int:
+        height = self._viewport.winfo_height()
+        return max(0, self._count * self.row_height - height)
+
+    def _layout(self):
+        height = max(self._viewport.winfo_height(), self.row_height)
+        needed = min(self._count, math.ceil(height / self.row_height) + 1)
+        while len(self._pool) < needed:
+            self._pool.append(self._create_row(self._viewport))
+
+        first = self._offset // self.row_height
+        shift = self._offset % self.row_height
+        for slot, row in enumerate(self._pool):
+            index = first + slot
+            if slot < needed and index < self._count:
+                self._bind_row(row, index)
+                row.place(x=0, y=slot * self.row_height - shift,
+                          relwidth=1.0, height=self.row_height)
+            else:
+                row.place_forget()
+
+        total = self._count * self.row_height
+        if total <= height:
+            self._scrollbar.set(0.0, 1.0)
+        else:
+            self._scrollbar.set(self._offset / total, (self._offset + height) / total)
+
+    def _scroll_by(self, pixels: int):
+        new_offset = max(0, min(self._offset + pixels, self._max_offset()))
+        if new_offset != self._offset:
+            self._offset = new_offset
+            self._layout()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            total = self._count * self.row_height
+            self._offset = max(0, min(int(float(value) * total), self._max_offset()))
+            self._layout()
+        elif action == "scroll":
+            step = self._viewport.winfo_height() if unit == "pages" else self.row_height
+            self._scroll_by(int(value) * step)
+
+    def _on_mouse_wheel(self, event):
+        if not self._is_inside(event.widget):
+            return
+        if event.num == 4:
+            rows = -3
+        elif event.num == 5:
+            rows = 3
+        elif sys.platform == "darwin":
+            rows = -event.delta
+        else:
+            rows = -int(event.delta / 40)
+        self._scroll_by(rows * self.row_height)
+
+    def _is_inside(self, widget) -> bool:
+        while widget is not None:
+            if widget is self._viewport:
+                return True
+            widget = getattr(widget, "master", None)
+        return False